@@ -0,0 +1,98 @@
+"""
+CPU-aware limits on concurrent OCR.
+
+Tesseract builds with OpenMP start a team of threads for every recognition.
+With several recognitions in flight per process, several processes per host and
+spaCy on the same cores, the host ends up running many times more threads than
+it has cores, and throughput drops as workers are added. `OCRGovernor` caps the
+OpenMP team of each recognition (`OMP_THREAD_LIMIT`) and admits only as many
+concurrent recognitions per process as that process's share of the cores
+allows.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Set by launchers that run more than one OCR process per host (pre-fork workers, process pools)
+PROCESSES_ENV = "OCR_PROCESSES"
+
+
+def available_cores() -> int:
+    """Cores this process may run on, honouring CPU affinity (taskset, container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def ocr_processes() -> int:
+    """Number of processes on the host that share the cores for OCR"""
+    try:
+        return max(1, int(os.getenv(PROCESSES_ENV, "1")))
+    except ValueError:
+        return 1
+
+
+class OCRGovernor:
+    """Admission control for tesseract calls in one process"""
+
+    def __init__(self, slots: int, thread_limit: int = 1):
+        self.slots = max(1, slots)
+        self.thread_limit = max(1, thread_limit)
+        self._semaphore = threading.BoundedSemaphore(self.slots)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waits = 0
+        self.apply_thread_limit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], cores: Optional[int] = None, processes: Optional[int] = None) -> "OCRGovernor":
+        """Size the governor from `ocr.concurrency`, splitting the cores between the OCR processes.
+
+        `thread_limit` is the OpenMP team size of one recognition (an existing
+        OMP_THREAD_LIMIT, else 1: several single-threaded recognitions use the
+        cores better than one parallel one). `max_concurrent` fixes the number of
+        recognitions in flight; by default it is this process's share of the
+        cores divided by the thread limit.
+        """
+        cores = cores or available_cores()
+        processes = processes or ocr_processes()
+        thread_limit = config.get("thread_limit") or int(os.getenv("OMP_THREAD_LIMIT") or 1)
+        slots = config.get("max_concurrent") or max(1, cores // (processes * thread_limit))
+        return cls(slots, thread_limit)
+
+    def apply_thread_limit(self):
+        """Cap the OpenMP team of every recognition started from this process.
+
+        Tesseract subprocesses inherit the variable on each call; libtesseract
+        in-process reads it when OpenMP starts, so the governor is created
+        before the OCR backend is loaded.
+        """
+        os.environ["OMP_THREAD_LIMIT"] = str(self.thread_limit)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the concurrent recognition slots for the duration of an OCR call"""
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            self._semaphore.acquire()
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "thread_limit": self.thread_limit,
+                "in_use": self._in_use,
+                "waits": self._waits
+            }
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+REQUIRED_FIELDS = ["name", "college", "roll_number", "branch", "valid_upto"]
+
+@dataclass
+class ExtractionResult:
+    """OCR text and NER fields produced by a single pass over one card"""
+
+    raw_text: str
+    fields: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    overall_confidence: float = 0.0
+    ocr_pass: Optional[str] = None  # Last OCR cascade pass the card needed
+    rejection: Optional[Dict[str, Any]] = None  # Why the image was refused before OCR
+    near_duplicate: bool = False  # Reused from a previously read copy of the same card
+    document_type: Optional[str] = None  # Document type the fields were matched to
+    required_fields: List[str] = field(default_factory=lambda: list(REQUIRED_FIELDS))  # Of that document type
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "extracted_fields": self.fields,
+            "overall_confidence": self.overall_confidence,
+            "raw_text": self.raw_text,
+            "ocr_pass": self.ocr_pass,
+            "rejection": self.rejection,
+            "near_duplicate": self.near_duplicate,
+            "document_type": self.document_type,
+            "required_fields": self.required_fields
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExtractionResult":
+        return cls(
+            raw_text=data["raw_text"],
+            fields=data["extracted_fields"],
+            overall_confidence=data["overall_confidence"],
+            ocr_pass=data.get("ocr_pass"),
+            rejection=data.get("rejection"),
+            near_duplicate=data.get("near_duplicate", False),
+            document_type=data.get("document_type"),
+            required_fields=data.get("required_fields", list(REQUIRED_FIELDS))
+        )
+
+    def missing_fields(self, threshold: float) -> List[str]:
+        """Required fields not extracted at or above the threshold"""
+        return [name for name in self.required_fields if self.fields.get(name, {}).get("confidence", 0) < threshold]
+
+    def to_response(self, threshold: float, required_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Keep fields at or above the threshold and summarise which required fields are missing"""
+        if required_fields is None:
+            required_fields = self.required_fields
+        response = {
+            "extracted_fields": {},
+            "confidence_scores": {},
+            "raw_text": self.raw_text,
+            "overall_confidence": 0.0,
+            "ocr_pass": self.ocr_pass,
+            "near_duplicate": self.near_duplicate,
+            "document_type": self.document_type
+        }
+
+        field_confidences = []
+        for name, value in self.fields.items():
+            if value["confidence"] >= threshold:
+                response["extracted_fields"][name] = value["text"]
+                response["confidence_scores"][name] = value["confidence"]
+                field_confidences.append(value["confidence"])
+
+        if field_confidences:
+            response["overall_confidence"] = sum(field_confidences) / len(field_confidences)
+
+        response["missing_fields"] = [name for name in required_fields if name not in response["extracted_fields"]]
+
+        if self.rejection is not None:
+            response["status"] = "rejected"
+            response["rejection"] = self.rejection
+        elif not response["missing_fields"]:
+            response["status"] = "success"
+        elif response["extracted_fields"]:
+            response["status"] = "partial_success"
+        else:
+            response["status"] = "failure"
+
+        return response
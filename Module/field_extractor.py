@@ -0,0 +1,162 @@
+"""
+Labelled-field extraction configured by `ner.fields`.
+
+Each field names the label printed before its value ("Roll number:") and the
+constraints a value must meet: a `pattern` a well-formed value fully matches,
+`min_length`/`max_length`, and whether the field is `required`.
+`FieldExtractor` compiles every label into one regex of named groups, so a
+single scan over the text finds all labelled fields in any order. A value runs
+from its label to the next known label or the end of the text. Labels also tell
+which parts of the text belong to which field, so model entities that cross a
+label or sit in another field's value can be discarded.
+
+`ner.document_types` lists the fields printed on each kind of document. A card
+is taken to be the type whose fields it shows the most of, and only that type's
+required fields are reported missing. New document types need config only.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+# Characters OCR adds around values that no field contains
+JUNK = re.compile(r"[^\w\s@.,'-]")
+
+# Fields of the student cards this service was built for, used when `ner.fields` is not configured
+DEFAULT_FIELDS = {
+    "name": {"pattern": r"^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$", "required": True, "min_length": 2, "max_length": 50},
+    "college": {"pattern": r"^[A-Z][A-Za-z.&]*(?:\s+[A-Za-z.&]+)*$", "required": True, "min_length": 2, "max_length": 80},
+    "roll_number": {"pattern": r"^[0-9]{2}[A-Z]{3,4}[0-9]{4}$", "required": True},
+    "branch": {"pattern": r"^[A-Z][A-Za-z&]*(?:\s+[A-Za-z&]+)*$", "required": True, "min_length": 2, "max_length": 60},
+    "valid_upto": {"pattern": r"^20[0-9]{2}$", "required": True},
+    # Some cards name the college under another label
+    "university": {"pattern": r"^[A-Z][A-Za-z.&]*(?:\s+[A-Za-z.&]+)*$", "min_length": 2, "max_length": 80},
+    "institution": {"pattern": r"^[A-Z][A-Za-z.&]*(?:\s+[A-Za-z.&]+)*$", "min_length": 2, "max_length": 80}
+}
+DEFAULT_DOCUMENT_TYPES = {"student_id": list(DEFAULT_FIELDS)}
+
+
+class LabelledValue(NamedTuple):
+    field: str
+    text: str
+    label_start: int
+    start: int  # Span of the value
+    end: int
+
+
+@dataclass
+class FieldSpec:
+    name: str
+    label: str  # Regex for the printed label, without the colon
+    pattern: Optional[str] = None
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+    required: bool = False
+    _shape: Optional["re.Pattern"] = field(default=None, init=False, repr=False, compare=False)
+    _loose_shape: Optional["re.Pattern"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.pattern:
+            self._shape = re.compile(self.pattern)
+            self._loose_shape = re.compile(self.pattern, re.IGNORECASE)
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "FieldSpec":
+        return cls(
+            name=name,
+            # "valid_upto" is printed as "Valid upto", or "Valid  upto" after OCR
+            label=data.get("label", r"\s*".join(name.split("_"))),
+            pattern=data.get("pattern"),
+            min_length=data.get("min_length"),
+            max_length=data.get("max_length"),
+            required=data.get("required", False)
+        )
+
+    def fits(self, value: str) -> bool:
+        """Whether the value is within the length limits"""
+        if self.min_length is not None and len(value) < self.min_length:
+            return False
+        return self.max_length is None or len(value) <= self.max_length
+
+    def well_formed(self, value: str, ignore_case: bool = False) -> bool:
+        """Whether the value has the expected shape; any value does when no pattern is set"""
+        if self._shape is None:
+            return True
+        return bool((self._loose_shape if ignore_case else self._shape).fullmatch(value))
+
+
+class FieldExtractor:
+    """Finds labelled field values in a single pass and validates them against their specs"""
+
+    def __init__(self, fields: List[FieldSpec], document_types: Optional[Dict[str, List[str]]] = None):
+        self.fields = {spec.name: spec for spec in fields}
+        self.document_types = document_types or {"default": list(self.fields)}
+        for document_type, names in self.document_types.items():
+            unknown = [name for name in names if name not in self.fields]
+            if unknown:
+                raise ValueError(f"Document type {document_type} lists unknown fields {unknown}")
+        labels = "|".join(rf"(?P<{spec.name}>{spec.label})" for spec in fields)
+        self._scanner = re.compile(rf"\b(?:{labels})\s*:\s*", re.IGNORECASE)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FieldExtractor":
+        """Build from the `ner` config section, defaulting to the student card fields"""
+        fields = config.get("fields") or DEFAULT_FIELDS
+        document_types = config.get("document_types") or (DEFAULT_DOCUMENT_TYPES if fields is DEFAULT_FIELDS else None)
+        return cls([FieldSpec.from_dict(name, data) for name, data in fields.items()], document_types)
+
+    @staticmethod
+    def clean(value: str) -> str:
+        return JUNK.sub("", value).strip()
+
+    def normalise(self, name: str, value: str) -> Optional[str]:
+        """The cleaned value, or None when it is empty or outside its field's length limits"""
+        value = self.clean(value)
+        spec = self.fields.get(name)
+        if not value or (spec is not None and not spec.fits(value)):
+            return None
+        return value
+
+    def has_shape(self, name: str, value: str) -> Optional[bool]:
+        """Whether the value has its field's exact shape, or None when no pattern is configured"""
+        spec = self.fields.get(name)
+        if spec is None or not spec.pattern:
+            return None
+        return spec.well_formed(value)
+
+    def scan(self, text: str) -> List[LabelledValue]:
+        """Every labelled value in the text, in order"""
+        labels = list(self._scanner.finditer(text))
+        values = []
+        for label, following in zip(labels, labels[1:] + [None]):
+            end = following.start() if following is not None else len(text)
+            value = text[label.end():end].rstrip()
+            values.append(LabelledValue(label.lastgroup, value, label.start(), label.end(), label.end() + len(value)))
+        return values
+
+    @staticmethod
+    def conflicts(labelled: List[LabelledValue], field: str, start: int, end: int) -> bool:
+        """Whether text[start:end] crosses a label or overlaps the value of a different field"""
+        for name, _, label_start, value_start, value_end in labelled:
+            if end > label_start and (start < value_start or (name != field and start < value_end)):
+                return True
+        return False
+
+    def document_type(self, names: Iterable[str]) -> str:
+        """The document type listing the most of the found fields; the first listed on a tie"""
+        found = set(names)
+        return max(self.document_types, key=lambda document_type: len(found.intersection(self.document_types[document_type])))
+
+    def required_fields(self, document_type: str) -> List[str]:
+        return [name for name in self.document_types[document_type] if self.fields[name].required]
+
+    def describe(self) -> str:
+        """Stable digest of the field specs and document types, for cache keys"""
+        specs = {
+            name: [spec.label, spec.pattern, spec.min_length, spec.max_length, spec.required]
+            for name, spec in self.fields.items()
+        }
+        payload = json.dumps([specs, self.document_types], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:12]
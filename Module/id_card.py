@@ -16,6 +16,55 @@ gt_dir = os.getenv("gt_dir")
 output_lstmf_dir = os.getenv("output_lstmf_dir")
 
 class IdCard:
+    @staticmethod
+    def render_card(user_id, fields, font_path=None):
+        """Draw the standard 600x300 card layout: a header, then one field per row"""
+        img = Image.new("RGB", (600, 300), color="white")
+        draw = ImageDraw.Draw(img)
+        font = ImageFont.truetype(font_path or FONT_PATH, FONT_SIZE)
+
+        y = 20
+        draw.text((20, y), f"ID Card - {user_id}", font=font, fill="black")
+        y += 40
+        for key, value in fields.items():
+            draw.text((20, y), f"{key.capitalize().replace('_', ' ')}: {value}", font=font, fill="black")
+            y += 35
+
+        return img
+
+    @staticmethod
+    def build_template(name, field_whitelists, font_path=None, field_patterns=None):
+        """Describe where render_card draws each field, for template-mode OCR.
+
+        Boxes are (left, top, right, bottom) on the 600x300 canvas. The value
+        box starts right after the "Label: " text, so each field can be read
+        with its own character whitelist. `field_patterns` are optional regexes
+        a correctly read value matches.
+        """
+        font = ImageFont.truetype(font_path or FONT_PATH, FONT_SIZE)
+        template = {
+            "name": name,
+            "size": [600, 300],
+            "header_box": [20, 20, 590, 54],
+            "fields": []
+        }
+        y = 60
+        for key, whitelist in field_whitelists.items():
+            label = f"{key.capitalize().replace('_', ' ')}:"
+            label_end = 20 + int(round(font.getlength(label)))
+            value_start = 20 + int(round(font.getlength(label + " ")))
+            template["fields"].append({
+                "name": key,
+                "label": label,
+                "label_box": [20, y, label_end, y + 34],
+                "box": [value_start - 1, y, 590, y + 34],
+                "whitelist": whitelist
+            })
+            if field_patterns and key in field_patterns:
+                template["fields"][-1]["pattern"] = field_patterns[key]
+            y += 35
+        return template
+
     @staticmethod
     def create_id_card(json_file_path):
         with open(json_file_path, "r") as f:
@@ -39,17 +88,7 @@ class IdCard:
                 continue
             validated_fields[key] = value
 
-        # Create image
-        img = Image.new("RGB", (600, 300), color="white")
-        draw = ImageDraw.Draw(img)
-        font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
-
-        y = 20
-        draw.text((20, y), f"ID Card - {user_id}", font=font, fill="black")
-        y += 40
-        for key, value in validated_fields.items():
-            draw.text((20, y), f"{key.capitalize().replace('_', ' ')}: {value}", font=font, fill="black")
-            y += 35
+        img = IdCard.render_card(user_id, validated_fields)
 
         output_path = os.path.join(OUTPUT_DIR, f"{user_id}.png")
         img.save(output_path)
@@ -0,0 +1,126 @@
+"""
+Header-first image decoding.
+
+An upload is checked against the byte and pixel limits before any pixel data is
+decoded: only the file header is read to learn the format and dimensions. The
+image is then decoded straight to grayscale at the largest power-of-two
+reduction that still covers the working width of the preprocessing passes. For
+JPEG the reduction happens inside libjpeg (DCT scaling), so a 12 MP phone photo
+is never held in memory at full resolution or in colour.
+"""
+
+import io
+import os
+from typing import Optional, Tuple, Union
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+EncodedImage = Union[str, bytes, bytearray, memoryview]
+
+# Reduction factors OpenCV (and libjpeg) can apply while decoding
+REDUCTIONS = (8, 4, 2)
+
+
+class InvalidImageError(ValueError):
+    """Raised when input cannot be decoded as an image"""
+
+
+class ImageTooLargeError(InvalidImageError):
+    """Raised when an image exceeds the configured byte or pixel limits"""
+
+
+class ImageLoader:
+    """Decodes encoded images to grayscale arrays, no larger than the pipeline needs"""
+
+    def __init__(self, max_pixels: Optional[int] = None, max_bytes: Optional[int] = None, target_width: Optional[int] = None):
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        # Narrowest width the decoded image may have; None decodes at full resolution
+        self.target_width = target_width
+
+    @classmethod
+    def from_config(cls, config: dict, target_width: Optional[int] = None) -> "ImageLoader":
+        """Build from the `ocr.loader` settings; `decode_width` overrides the pipeline's working width"""
+        max_megapixels = config.get("max_megapixels")
+        max_file_size_mb = config.get("max_file_size_mb")
+        if not config.get("reduced_decode", True):
+            target_width = None
+        elif config.get("decode_width"):
+            target_width = config["decode_width"]
+        return cls(
+            max_pixels=int(max_megapixels * 1_000_000) if max_megapixels else None,
+            max_bytes=int(max_file_size_mb * 1024 * 1024) if max_file_size_mb else None,
+            target_width=target_width
+        )
+
+    def describe(self) -> str:
+        """Stable summary of the settings that change decoded pixels, for cache keys"""
+        return f"decode_width={self.target_width}"
+
+    def reduction(self, width: int) -> int:
+        """Largest decode-time reduction that keeps the image at least `target_width` wide"""
+        if self.target_width:
+            for factor in REDUCTIONS:
+                if width // factor >= self.target_width:
+                    return factor
+        return 1
+
+    def probe(self, data: Union[bytes, bytearray, memoryview]) -> Tuple[str, Tuple[int, int]]:
+        """Format and (width, height) from the image header, checked against the limits"""
+        if self.max_bytes and len(data) > self.max_bytes:
+            raise ImageTooLargeError(f"Image is {len(data)} bytes, limit is {self.max_bytes}")
+        try:
+            # Image.open parses the header only; pixel data is read on load()
+            with Image.open(io.BytesIO(data)) as image:
+                image_format, size = image.format, image.size
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e)) from e
+        except (UnidentifiedImageError, OSError) as e:
+            raise InvalidImageError(f"Could not decode image: {e}") from e
+
+        width, height = size
+        if self.max_pixels and width * height > self.max_pixels:
+            raise ImageTooLargeError(
+                f"Image is {width}x{height} ({width * height / 1e6:.1f} MP), limit is {self.max_pixels / 1e6:.1f} MP"
+            )
+        return image_format, size
+
+    def read(self, source: EncodedImage) -> Union[bytes, bytearray, memoryview]:
+        """Encoded bytes of a path or buffer, refusing oversize files before reading them"""
+        if not isinstance(source, str):
+            return source
+        try:
+            if self.max_bytes and os.path.getsize(source) > self.max_bytes:
+                raise ImageTooLargeError(f"{source} is larger than {self.max_bytes} bytes")
+            with open(source, "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise InvalidImageError(f"Could not read image: {e}") from e
+
+    def load(self, source: EncodedImage) -> np.ndarray:
+        """Decode a path or encoded buffer to a grayscale uint8 array"""
+        import cv2
+
+        data = self.read(source)
+        _, (width, height) = self.probe(data)
+        factor = self.reduction(width)
+        flags = {
+            1: cv2.IMREAD_GRAYSCALE,
+            2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+            4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+            8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+        }[factor]
+        # EXIF rotation is left to the deskew stage, as with any other rotated card
+        gray = cv2.imdecode(np.frombuffer(data, np.uint8), flags | cv2.IMREAD_IGNORE_ORIENTATION)
+        if gray is not None:
+            return gray
+
+        # Formats OpenCV cannot decode (GIF, some TIFFs) go through PIL at full size
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert("L")
+        except (UnidentifiedImageError, OSError) as e:
+            raise InvalidImageError(f"Could not decode image: {e}") from e
+        if factor > 1:
+            image = image.reduce(factor)
+        return np.asarray(image)
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Set
+from .metrics import MODEL_LOAD_SECONDS
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
+@dataclass
+class LoadedModel:
+    """A loaded spaCy pipeline and where it came from"""
+    nlp: "Language"
+    source_path: str
+    version: str
+    loaded_at: float
+    load_seconds: float
+
+class ModelRegistry:
+    """Process-wide cache so every processor shares one copy of each spaCy model.
+
+    Models are registered under the configured path. `reload` loads a new copy
+    next to the serving one and swaps it in atomically, so requests that already
+    hold the old pipeline finish on it while new requests get the new one.
+
+    Only the components named in `pipes`, and the embedding components they
+    listen to, are loaded; the tokenizer always is. Anything else a saved
+    pipeline ships (tagger, parser, lemmatizer...) would run on every text
+    without being used.
+    """
+
+    _default: Optional["ModelRegistry"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, pipes: Sequence[str] = ("ner",)):
+        self.pipes = tuple(pipes)
+        self._models: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+        # Serialises reloads so two triggers never load the same model twice
+        self._reload_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ModelRegistry":
+        """Return the registry shared by processors that are not given one"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @staticmethod
+    def _key(model_path: str) -> str:
+        return os.path.abspath(model_path)
+
+    def _load(self, source_path: str) -> LoadedModel:
+        # spaCy is imported on first load so importing the API stays cheap
+        import spacy
+
+        # Read before loading so files replaced mid-load show up as a new version
+        version = self._read_version(source_path)
+        start = time.perf_counter()
+        nlp = spacy.load(source_path, exclude=self.unused_pipes(source_path))
+        load_seconds = time.perf_counter() - start
+        MODEL_LOAD_SECONDS.set(load_seconds, model=source_path)
+        return LoadedModel(nlp, source_path, version, time.time(), load_seconds)
+
+    def unused_pipes(self, model_path: str) -> List[str]:
+        """Components of a saved pipeline that neither `pipes` nor their embedding listeners need"""
+        from spacy.util import load_config
+
+        config_path = os.path.join(model_path, "config.cfg")
+        if not os.path.exists(config_path):
+            return []
+        config = load_config(config_path)
+        components = config["components"]
+        needed = set(self.pipes)
+        for name in self.pipes:
+            upstreams = _listener_upstreams(components.get(name, {}))
+            if "*" in upstreams:
+                # A wildcard listener takes the embeddings of any tok2vec or transformer component
+                upstreams |= {
+                    other for other, block in components.items()
+                    if "tok2vec" in block.get("factory", "") or "transformer" in block.get("factory", "")
+                }
+            needed |= upstreams
+        return [name for name in config["nlp"]["pipeline"] if name not in needed]
+
+    def _entry(self, model_path: str) -> LoadedModel:
+        key = self._key(model_path)
+        # Plain dict reads are atomic, so the hot path does not take the lock
+        entry = self._models.get(key)
+        if entry is None:
+            with self._lock:
+                if key not in self._models:
+                    self._models[key] = self._load(model_path)
+                entry = self._models[key]
+        return entry
+
+    def get(self, model_path: str) -> "Language":
+        """Load a model on first use and return the current instance afterwards"""
+        return self._entry(model_path).nlp
+
+    def version(self, model_path: str) -> str:
+        """Version of a loaded model: meta.json version plus a fingerprint of its files"""
+        return self._entry(model_path).version
+
+    def info(self, model_path: str) -> Optional[Dict[str, Any]]:
+        """Version and load timings of the model served under `model_path`, if loaded"""
+        entry = self._models.get(self._key(model_path))
+        if entry is None:
+            return None
+        return {
+            "version": entry.version,
+            "source_path": entry.source_path,
+            "loaded_at": entry.loaded_at,
+            "load_seconds": entry.load_seconds
+        }
+
+    def reload(
+        self,
+        model_path: str,
+        source_path: Optional[str] = None,
+        validate: Optional[Callable[["Language"], None]] = None
+    ) -> Dict[str, Any]:
+        """Load a new model version and swap it in under `model_path`.
+
+        The model is read from `source_path` (default: where the current one
+        came from) and passed to `validate`, which raises to reject it. The
+        serving model is untouched until the new one has loaded and validated.
+        """
+        key = self._key(model_path)
+        with self._reload_lock:
+            current = self._models.get(key)
+            source_path = source_path or (current.source_path if current else model_path)
+            entry = self._load(source_path)
+            if validate is not None:
+                validate(entry.nlp)
+            with self._lock:
+                self._models[key] = entry
+        return self.info(model_path)
+
+    @staticmethod
+    def _read_version(model_path: str) -> str:
+        meta_version = "0.0.0"
+        meta_path = os.path.join(model_path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta_version = json.load(f).get("version", meta_version)
+        return f"{meta_version}+{ModelRegistry.fingerprint(model_path)}"
+
+    @staticmethod
+    def fingerprint(model_path: str) -> str:
+        """Short hash of the sizes and mtimes of every file in a model directory"""
+        # Retraining overwrites files in place without bumping meta.json, so fingerprint them
+        fingerprint = hashlib.sha1()
+        for root, _, files in sorted(os.walk(model_path)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                fingerprint.update(f"{os.path.relpath(path, model_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return fingerprint.hexdigest()[:8]
+
+    def loaded_models(self) -> Dict[str, "Language"]:
+        with self._lock:
+            return {key: entry.nlp for key, entry in self._models.items()}
+
+
+def _listener_upstreams(block: Any) -> Set[str]:
+    """Names of the components whose embeddings a component's config listens to ("*" for any)"""
+    upstreams = set()
+    if isinstance(block, dict):
+        if "Listener" in str(block.get("@architectures", "")):
+            upstreams.add(block.get("upstream", "*"))
+        for value in block.values():
+            upstreams |= _listener_upstreams(value)
+    return upstreams
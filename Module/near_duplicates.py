@@ -0,0 +1,170 @@
+"""
+Perceptual-hash index of recent extraction results.
+
+Clients often upload the same card again after re-encoding or resizing it, and
+the new bytes miss the exact-byte `ResultCache`. `CardFingerprint` describes the
+card itself: a small, lightly blurred thumbnail of the grayscale card (cut out
+of its background when it was photographed) with its contrast stretched, and a
+difference hash of that thumbnail on a 64x32 grid. Each grid cell records
+whether its right and lower neighbours are clearly brighter, clearly darker or
+about the same, so flat paper does not flip bits under JPEG noise.
+
+Cards printed from one template differ only in a few words, and a single
+changed digit moves the hash less than re-encoding does. The hash therefore
+only finds candidates within `max_distance` bits; a candidate is a duplicate
+when no small patch of the two thumbnails differs by more than `max_difference`
+grey levels. On the sample cards a one-digit change differs by 80 grey levels,
+while JPEG, resized and relit copies of a card stay below 27.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .extraction_result import ExtractionResult
+from .metrics import REGISTRY
+from .preprocessing import find_card, warp_card
+
+THUMBNAIL_SIZE = (384, 192)  # Width, height of the normalised card
+HASH_GRID = (64, 32)  # Cells across and down the card
+DEAD_ZONE = 8  # Grey levels two neighbouring cells must differ by to set a bit
+HASH_BYTES = HASH_GRID[0] * HASH_GRID[1] * 4 // 8
+CANDIDATES = 4  # Closest hashes verified against their thumbnails
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], np.uint8)
+
+NEAR_DUPLICATE_LOOKUPS = REGISTRY.counter(
+    "idcard_near_duplicate_lookups_total",
+    "Near-duplicate index lookups by outcome",
+    ("result",)
+)
+NEAR_DUPLICATE_DISTANCE = REGISTRY.histogram(
+    "idcard_near_duplicate_distance",
+    "Hamming distance to the closest indexed card",
+    buckets=(8, 16, 32, 64, 96, 128, 256, 512, 1024)
+)
+NEAR_DUPLICATE_DIFFERENCE = REGISTRY.histogram(
+    "idcard_near_duplicate_difference",
+    "Largest local grey-level difference to the closest indexed card within the hash distance",
+    buckets=(5, 10, 20, 30, 40, 60, 80, 120, 255)
+)
+
+
+@dataclass
+class CardFingerprint:
+    hash: np.ndarray  # Packed bits, HASH_BYTES long
+    thumbnail: np.ndarray  # uint8, THUMBNAIL_SIZE
+
+    @classmethod
+    def of(cls, image: np.ndarray) -> "CardFingerprint":
+        """Fingerprint a grayscale card image, flattening it first when it was photographed"""
+        import cv2
+
+        width, height = THUMBNAIL_SIZE
+        corners = find_card(image)
+        if corners is not None:
+            image = warp_card(image, corners, (2 * width, 2 * height))
+        low, high = np.percentile(image, (1, 99))
+        stretched = np.clip((image.astype(np.float32) - low) * (255 / max(high - low, 1)), 0, 255)
+        thumbnail = cv2.GaussianBlur(cv2.resize(stretched, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA), (0, 0), 0.8)
+
+        columns, rows = HASH_GRID
+        cells = cv2.resize(thumbnail, (columns + 1, rows + 1), interpolation=cv2.INTER_AREA)
+        across = cells[:-1, 1:] - cells[:-1, :-1]
+        down = cells[1:, :-1] - cells[:-1, :-1]
+        bits = np.concatenate([across > DEAD_ZONE, across < -DEAD_ZONE, down > DEAD_ZONE, down < -DEAD_ZONE], axis=None)
+        return cls(hash=np.packbits(bits), thumbnail=np.round(thumbnail).astype(np.uint8))
+
+
+def thumbnail_difference(first: np.ndarray, second: np.ndarray) -> float:
+    """Largest mean grey-level difference over any 3x3 patch of two thumbnails"""
+    import cv2
+
+    difference = cv2.absdiff(first, second).astype(np.float32)
+    return float(cv2.blur(difference, (3, 3)).max())
+
+
+class NearDuplicateIndex:
+    """LRU index of extraction results by card fingerprint.
+
+    Each entry is stored with the pipeline settings that produced it and only
+    matches lookups made with the same settings. Every entry keeps its
+    thumbnail, about 72 KB.
+    """
+
+    def __init__(self, max_distance: int = 128, max_difference: float = 40, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_distance = max_distance
+        self.max_difference = max_difference
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._hashes = np.zeros((max_entries, HASH_BYTES), np.uint8)
+        self._thumbnails = np.zeros((max_entries, THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0]), np.uint8)
+        self._expires_at = np.zeros(max_entries)  # 0 marks a free slot
+        self._last_used = np.zeros(max_entries)
+        self._entries: List[Optional[Tuple[str, ExtractionResult]]] = [None] * max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["NearDuplicateIndex"]:
+        """Build from `cache.near_duplicate`, or None when the index is off"""
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            max_distance=config.get("max_distance", 128),
+            max_difference=config.get("max_difference", 40),
+            max_entries=config.get("max_entries", 256),
+            ttl_seconds=config.get("ttl_seconds", 3600)
+        )
+
+    def lookup(self, fingerprint: CardFingerprint, settings: str) -> Optional[ExtractionResult]:
+        """The stored result of a card that `fingerprint` is a copy of, flagged as a near duplicate"""
+        now = time.time()
+        with self._lock:
+            slots = np.array([
+                slot for slot in np.flatnonzero(self._expires_at > now)
+                if self._entries[slot][0] == settings
+            ], np.intp)
+            if slots.size:
+                distances = POPCOUNT[self._hashes[slots] ^ fingerprint.hash].sum(axis=1, dtype=np.int32)
+                order = np.argsort(distances, kind="stable")
+                NEAR_DUPLICATE_DISTANCE.observe(int(distances[order[0]]))
+                for rank, position in enumerate(order[:CANDIDATES]):
+                    if distances[position] > self.max_distance:
+                        break
+                    slot = slots[position]
+                    difference = thumbnail_difference(self._thumbnails[slot], fingerprint.thumbnail)
+                    if rank == 0:
+                        NEAR_DUPLICATE_DIFFERENCE.observe(difference)
+                    if difference <= self.max_difference:
+                        self._last_used[slot] = now
+                        self.hits += 1
+                        NEAR_DUPLICATE_LOOKUPS.inc(result="hit")
+                        return replace(self._entries[slot][1], near_duplicate=True)
+            self.misses += 1
+            NEAR_DUPLICATE_LOOKUPS.inc(result="miss")
+            return None
+
+    def add(self, fingerprint: CardFingerprint, settings: str, result: ExtractionResult):
+        now = time.time()
+        with self._lock:
+            free = np.flatnonzero(self._expires_at <= now)
+            # Reuse an expired slot, else evict the least recently used entry
+            slot = int(free[0]) if free.size else int(np.argmin(self._last_used))
+            self._hashes[slot] = fingerprint.hash
+            self._thumbnails[slot] = fingerprint.thumbnail
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._entries[slot] = (settings, result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": int(np.count_nonzero(self._expires_at > time.time())),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -1,23 +1,91 @@
-import spacy
-from spacy.tokens import DocBin
-from spacy.training import Example
+import itertools
 import json
 import os
 import random
-from typing import List, Dict, Tuple
+import time
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
 import re
+from .field_extractor import FieldExtractor
+from .model_registry import ModelRegistry
+from .metrics import record_stage, stage
+from .profiling import RequestProfiler
+
+# Synthetic card text a newly loaded model must tag before it is swapped in
+SMOKE_CARD_TEXT = (
+    "ID Card - stu_001 Name: Nathan Henry College: JNTU Kakinada "
+    "Roll number: 22JNT5377 Branch: Computer Science Valid upto: 2028"
+)
+SMOKE_CARD_LABELS = {"NAME", "ROLL_NUMBER"}
 
 class NERProcessor:
-    def __init__(self, model_path: str = None):
-        """Initialize NER processor with optional pre-trained model"""
+    def __init__(
+        self,
+        model_path: str = None,
+        registry: ModelRegistry = None,
+        batch_size: int = 64,
+        n_process: int = 1,
+        fields: Optional[FieldExtractor] = None
+    ):
+        """Initialize NER processor with optional pre-trained model.
+
+        `batch_size` and `n_process` are passed to `nlp.pipe` by process_texts.
+        `fields` finds and validates labelled values alongside the model,
+        defaulting to the student card fields.
+        """
+        self.model_path = model_path
+        self.fields = fields or FieldExtractor.from_config({})
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self._registry = None
+        self._nlp = None
         if model_path and os.path.exists(model_path):
-            self.nlp = spacy.load(model_path)
+            # Trained models are shared through the registry instead of loaded per processor
+            self._registry = registry or ModelRegistry.default()
+            self._registry.get(model_path)
         else:
+            # spaCy is imported lazily so importing the API stays cheap
+            import spacy
+
             # Create a blank English model with only NER
-            self.nlp = spacy.blank("en")
-            if "ner" not in self.nlp.pipe_names:
-                self.nlp.add_pipe("ner")
-            
+            self._nlp = spacy.blank("en")
+            if "ner" not in self._nlp.pipe_names:
+                self._nlp.add_pipe("ner")
+
+    @property
+    def nlp(self):
+        """The current pipeline; read once per call so a reload never switches models mid-request"""
+        if self._registry is not None:
+            return self._registry.get(self.model_path)
+        return self._nlp
+
+    @property
+    def model_version(self) -> str:
+        if self._registry is not None:
+            return self._registry.version(self.model_path)
+        return "blank"
+
+    def model_info(self) -> Optional[Dict]:
+        """Version and load time of the served model (None for a blank model)"""
+        if self._registry is None:
+            return None
+        return self._registry.info(self.model_path)
+
+    @staticmethod
+    def validate_model(nlp) -> None:
+        """Reject a model that cannot tag the smoke card"""
+        if "ner" not in nlp.pipe_names:
+            raise ValueError("Model has no ner pipe")
+        found = {ent.label_ for ent in nlp(SMOKE_CARD_TEXT).ents}
+        missing = SMOKE_CARD_LABELS - found
+        if missing:
+            raise ValueError(f"Model failed the smoke card, missing {sorted(missing)}")
+
+    def reload(self, source_path: Optional[str] = None) -> Dict:
+        """Load, validate and swap in a new model version from `source_path` (default: in place)"""
+        if self._registry is None:
+            raise ValueError("No trained model is loaded")
+        return self._registry.reload(self.model_path, source_path, validate=self.validate_model)
+
     def prepare_training_data(self, json_dir: str) -> List[Tuple[str, Dict]]:
         """Convert JSON data to spaCy training format with improved text preparation"""
         training_data = []
@@ -55,6 +123,8 @@ class NERProcessor:
 
     def train_model(self, training_data: List[Tuple[str, Dict]], output_dir: str, n_iter: int = 50):
         """Train NER model with improved parameters"""
+        from spacy.training import Example
+
         # Get the NER pipe
         ner = self.nlp.get_pipe("ner")
         
@@ -110,8 +180,8 @@ class NERProcessor:
                 if label not in entity_counts:
                     entity_counts[label] = {"tp": 0, "fp": 0, "fn": 0}
         
-        for text, annotations in test_data:
-            doc = self.nlp(text)
+        docs = self.nlp.pipe((text for text, _ in test_data), batch_size=self.batch_size, n_process=self.n_process)
+        for (text, annotations), doc in zip(test_data, docs):
             pred_entities = set((ent.start_char, ent.end_char, ent.label_) for ent in doc.ents)
             true_entities = set(annotations["entities"])
             
@@ -162,61 +232,133 @@ class NERProcessor:
         
         return results
     
-    def process_text(self, text: str) -> Dict:
-        """Process text using trained NER model with confidence scores"""
-        # Preprocess text
+    def _prepare_text(self, text: str) -> str:
+        """Normalise OCR text before it is handed to the model"""
         text = text.replace('\n', ' ').strip()
-        text = re.sub(r'\s+', ' ', text)
-        
-        doc = self.nlp(text)
+        return re.sub(r'\s+', ' ', text)
+
+    def process_text(
+        self,
+        text: str,
+        profiler: Optional[RequestProfiler] = None,
+        word_confidences: Optional[Sequence[float]] = None
+    ) -> Dict:
+        """Process text using trained NER model with confidence scores.
+
+        `word_confidences` are the OCR confidences (0-100) of the
+        whitespace-separated words of `text`; when given, each field's score
+        also reflects how sure OCR was of the words it was read from.
+        """
+        return self.process_texts([text], [word_confidences], profiler)[0]
+
+    def process_texts(
+        self,
+        texts: Iterable[str],
+        word_confidences: Optional[Iterable[Optional[Sequence[float]]]] = None,
+        profiler: Optional[RequestProfiler] = None
+    ) -> List[Dict]:
+        """Stream texts through nlp.pipe, `batch_size` documents at a time, and return their fields in order.
+
+        `word_confidences`, when given, holds one entry per text as in
+        process_text. With `n_process` above 1 spaCy tags the batches in worker
+        processes, which only pays off for large offline runs.
+        """
+        if word_confidences is None:
+            word_confidences = itertools.repeat(None)
+        items = ((self._prepare_text(text), confidences) for text, confidences in zip(texts, word_confidences))
+        head = list(itertools.islice(items, 2))
+        if len(head) == 1:
+            # A single request's own model call, timed like every other stage of it
+            text, confidences = head[0]
+            with stage("ner_model", profiler):
+                doc = self.nlp(text)
+            with stage("ner_postprocess", profiler):
+                return [self._extract_entities(text, doc, confidences)]
+
+        texts_in, contexts = itertools.tee(itertools.chain(head, items))
+        docs = self.nlp.pipe((text for text, _ in texts_in), batch_size=self.batch_size, n_process=self.n_process)
+        results = []
+        model_seconds = 0.0
+        for _, confidences in contexts:
+            # The model runs lazily, a batch at a time, as documents are pulled from the stream
+            start = time.perf_counter()
+            doc = next(docs)
+            model_seconds += time.perf_counter() - start
+            with stage("ner_postprocess", profiler):
+                results.append(self._extract_entities(doc.text, doc, confidences))
+        # Recorded once per call, since the model time is shared by all its texts
+        record_stage("ner_model_batch", model_seconds)
+        return results
+
+    @staticmethod
+    def _word_spans(text: str, word_confidences: Optional[Sequence[float]]) -> Optional[List[Tuple[int, int, float]]]:
+        """(start, end, confidence) of each word of `text`, or None when the confidences do not line up"""
+        if word_confidences is None:
+            return None
+        words = [match.span() for match in re.finditer(r"\S+", text)]
+        if len(words) != len(word_confidences):
+            return None
+        return [(start, end, float(conf)) for (start, end), conf in zip(words, word_confidences)]
+
+    @staticmethod
+    def _span_confidence(word_spans: List[Tuple[int, int, float]], start: int, end: int) -> Optional[float]:
+        """Mean OCR confidence (0-1) of the words overlapping text[start:end]"""
+        overlapping = [conf for word_start, word_end, conf in word_spans if word_start < end and word_end > start]
+        return sum(overlapping) / len(overlapping) / 100 if overlapping else None
+
+    def _extract_entities(self, text: str, doc, word_confidences: Optional[Sequence[float]] = None) -> Dict:
+        """Combine model entities with the labelled values found by the field extractor and score them"""
         entities = {}
+        spans = {}
+        word_spans = self._word_spans(text, word_confidences)
+        labelled = self.fields.scan(text)
         
         # NER extraction with confidence scores
         for ent in doc.ents:
-            if len(ent.text.strip()) > 1:  # Filter out single-character entities
-                entities[ent.label_.lower()] = {
-                    "text": ent.text.strip(),
+            field = ent.label_.lower()
+            text_value = ent.text.strip()
+            span = (ent.start_char, ent.end_char)
+            # Filter out single-character entities and those the labels place elsewhere
+            if len(text_value) > 1 and not self.fields.conflicts(labelled, field, *span):
+                entities[field] = {
+                    "text": text_value,
                     "confidence": 0.85  # Base confidence for NER matches
                 }
+                spans[field] = span
         
-        # Enhanced regex patterns with named groups for our specific ID card format
-        patterns = {
-            "name": r"Name:\s*(?P<value>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-            "college": r"College:\s*(?P<value>JNTU\s*Kakinada)",
-            "roll_number": r"Roll\s*number:\s*(?P<value>22JNT\d{4})",
-            "branch": r"Branch:\s*(?P<value>Computer\s*Science)",
-            "valid_upto": r"Valid\s*upto:\s*(?P<value>20\d{2})"
-        }
-        
-        # Combine regex matches with NER results
-        for field, pattern in patterns.items():
-            if field not in entities:
-                matches = re.search(pattern, text, re.IGNORECASE)
-                if matches:
-                    entities[field] = {
-                        "text": matches.group('value').strip(),
-                        "confidence": 0.75  # Base confidence for regex matches
-                    }
+        # A labelled value with its field's shape (in any letter case) fills in or overrules the model
+        seen = set()
+        for item in labelled:
+            if not item.text or item.field in seen:
+                continue
+            seen.add(item.field)
+            if item.field in spans and spans[item.field][0] < item.end and spans[item.field][1] > item.start:
+                continue  # The model found the same value
+            cleaned = self.fields.clean(item.text)
+            if self.fields.fields[item.field].well_formed(cleaned, ignore_case=True):
+                entities[item.field] = {
+                    "text": cleaned,
+                    "confidence": 0.75  # Base confidence for labelled values
+                }
+                spans[item.field] = (item.start, item.end)
         
         # Post-process extracted entities
-        for field, value in entities.items():
-            # Clean the extracted text
-            cleaned_text = re.sub(r'[^\w\s@.-]', '', value["text"])
-            value["text"] = cleaned_text.strip()
-            
-            # Adjust confidence based on field-specific rules
-            if field == "roll_number" and re.match(r'^22JNT\d{4}$', cleaned_text):
-                value["confidence"] += 0.2
-            elif field == "college" and "JNTU KAKINADA" in cleaned_text.upper():
-                value["confidence"] += 0.2
-            elif field == "branch" and "COMPUTER SCIENCE" in cleaned_text.upper():
-                value["confidence"] += 0.2
-            elif field == "valid_upto" and re.match(r'^20\d{2}$', cleaned_text):
-                value["confidence"] += 0.2
-            elif field == "name" and re.match(r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$', cleaned_text):
+        for field, value in list(entities.items()):
+            text = self.fields.normalise(field, value["text"])
+            if text is None:
+                del entities[field]
+                continue
+            value["text"] = text
+            # Values with the exact expected shape are more likely read correctly
+            if self.fields.has_shape(field, text):
                 value["confidence"] += 0.2
             
             # Cap confidence at 1.0
             value["confidence"] = min(value["confidence"], 1.0)
+
+            # A field is only as reliable as the OCR of the words it was read from
+            ocr_confidence = self._span_confidence(word_spans, *spans[field]) if word_spans else None
+            if ocr_confidence is not None:
+                value["confidence"] *= ocr_confidence
         
-        return entities
\ No newline at end of file
+        return entities
@@ -0,0 +1,270 @@
+"""
+Pluggable OCR engines behind OCRProcessor.
+
+`PytesseractBackend` runs the tesseract binary once per call (the original
+behaviour). `TesserocrBackend` keeps initialised libtesseract engines in the
+process, one per worker thread, so the traineddata is loaded once instead of on
+every card. Both take pytesseract-style config strings.
+"""
+
+import os
+import shlex
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+import pytesseract
+
+# PIL images or grayscale uint8 arrays from the preprocessing pipeline
+OCRImage = Union[Image.Image, np.ndarray]
+
+DATA_KEYS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+             "left", "top", "width", "height", "conf", "text")
+
+# Tesseract's level number for word rows in image_to_data output
+WORD_LEVEL = 5
+
+
+@dataclass
+class OCRResult:
+    """Words recognised by one OCR call, in reading order, as parallel arrays"""
+
+    words: List[str] = field(default_factory=list)
+    boxes: np.ndarray = field(default_factory=lambda: np.zeros((0, 4), np.int32))  # left, top, width, height
+    line_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int32))  # Same id for words on one text line
+    confidences: np.ndarray = field(default_factory=lambda: np.zeros(0, np.float32))  # 0-100
+
+    @classmethod
+    def from_data(cls, data: Dict[str, List[Any]]) -> "OCRResult":
+        """Keep the recognised words of a pytesseract.Output.DICT style result"""
+        words, boxes, line_ids, confidences = [], [], [], []
+        lines: Dict[Tuple[int, int, int, int], int] = {}
+        for i, text in enumerate(data["text"]):
+            text = (text or "").strip()
+            confidence = float(data["conf"][i])
+            if not text or confidence < 0 or int(data["level"][i]) != WORD_LEVEL:
+                continue
+            line = (data["page_num"][i], data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            words.append(text)
+            boxes.append((data["left"][i], data["top"][i], data["width"][i], data["height"][i]))
+            line_ids.append(lines.setdefault(line, len(lines)))
+            confidences.append(confidence)
+        return cls(
+            words=words,
+            boxes=np.array(boxes, np.int32).reshape(-1, 4),
+            line_ids=np.array(line_ids, np.int32),
+            confidences=np.array(confidences, np.float32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def text(self) -> str:
+        """Words joined by spaces, one text line per row"""
+        lines: List[List[str]] = []
+        previous = None
+        for word, line_id in zip(self.words, self.line_ids.tolist()):
+            if line_id != previous:
+                lines.append([])
+                previous = line_id
+            lines[-1].append(word)
+        return "\n".join(" ".join(line) for line in lines)
+
+    def mean_confidence(self) -> float:
+        """Average word confidence on a 0-1 scale"""
+        return float(self.confidences.mean()) / 100 if len(self) else 0.0
+
+
+@lru_cache(maxsize=64)
+def parse_config(config: str) -> Tuple[str, Optional[int], Optional[int], Dict[str, str]]:
+    """Split a pytesseract config string into (lang, oem, psm, variables); treat the result as read-only"""
+    lang, oem, psm = "eng", None, None
+    variables: Dict[str, str] = {}
+    args = shlex.split(config)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if arg == "-l":
+            lang = value
+        elif arg == "--oem":
+            oem = int(value)
+        elif arg == "--psm":
+            psm = int(value)
+        elif arg == "--dpi":
+            variables["user_defined_dpi"] = value
+        elif arg == "-c":
+            name, _, setting = value.partition("=")
+            variables[name] = setting
+        else:
+            i += 1
+            continue
+        i += 2
+    return lang, oem, psm, variables
+
+
+class OCRBackend:
+    """Interface shared by the OCR engines"""
+
+    name = ""
+
+    def image_to_string(self, image: OCRImage, config: str = "") -> str:
+        raise NotImplementedError
+
+    def image_to_data(self, image: OCRImage, config: str = "") -> Dict[str, List[Any]]:
+        """Word-level results in the layout of pytesseract.Output.DICT"""
+        raise NotImplementedError
+
+    def image_to_result(self, image: OCRImage, config: str = "") -> OCRResult:
+        """Text, word boxes, line ids and confidences from a single recognition"""
+        return OCRResult.from_data(self.image_to_data(image, config))
+
+    def close(self):
+        pass
+
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract binary per call through pytesseract"""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: OCRImage, config: str = "") -> str:
+        return pytesseract.image_to_string(image, config=config)
+
+    def image_to_data(self, image: OCRImage, config: str = "") -> Dict[str, List[Any]]:
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrBackend(OCRBackend):
+    """In-process libtesseract through tesserocr, with one engine per thread and setting"""
+
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path: Optional[str] = None):
+        # Optional dependency: raises ImportError when tesserocr is not installed
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+        self._engines = []
+        self._lock = threading.Lock()
+
+    def has_language(self, lang: str) -> bool:
+        """Whether the traineddata for every language in `lang` (e.g. eng+hin) can be found"""
+        kwargs = {"path": os.path.join(self.tessdata_path, "")} if self.tessdata_path else {}
+        _, available = self._tesserocr.get_languages(**kwargs)
+        return all(part in available for part in lang.split("+"))
+
+    def _engine(self, config: str):
+        """Initialised engine for this thread, configured for `config`.
+
+        Loading the traineddata is the expensive part, so a thread keeps one
+        engine per language and engine mode and applies the page segmentation
+        mode and variables of each call to it.
+        """
+        lang, oem, psm, variables = parse_config(config)
+        engines = getattr(self._local, "engines", None)
+        if engines is None:
+            engines = self._local.engines = {}
+        engine = engines.get((lang, oem))
+        if engine is None:
+            kwargs = {"lang": lang}
+            if self.tessdata_path:
+                kwargs["path"] = os.path.join(self.tessdata_path, "")
+            if oem is not None:
+                kwargs["oem"] = oem
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            # Variables this engine has changed, with their original values
+            engine = engines[(lang, oem)] = (api, {}, {})
+            with self._lock:
+                self._engines.append(api)
+
+        api, defaults, current = engine
+        api.SetPageSegMode(psm if psm is not None else self._tesserocr.PSM.AUTO)
+        for name in [name for name in current if name not in variables]:
+            api.SetVariable(name, defaults[name])
+            del current[name]
+        for name, value in variables.items():
+            if name not in defaults:
+                defaults[name] = api.GetVariableAsString(name) or ""
+            if current.get(name) != value:
+                api.SetVariable(name, value)
+                current[name] = value
+        return api
+
+    @staticmethod
+    def _set_image(api, image: OCRImage):
+        if isinstance(image, np.ndarray) and image.ndim == 2:
+            # Grayscale buffers go straight to libtesseract without a PIL copy
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            api.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], 1, image.shape[1])
+        elif isinstance(image, np.ndarray):
+            api.SetImage(Image.fromarray(image))
+        else:
+            api.SetImage(image)
+
+    def image_to_string(self, image: OCRImage, config: str = "") -> str:
+        api = self._engine(config)
+        self._set_image(api, image)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_data(self, image: OCRImage, config: str = "") -> Dict[str, List[Any]]:
+        tesserocr = self._tesserocr
+        api = self._engine(config)
+        self._set_image(api, image)
+        data: Dict[str, List[Any]] = {key: [] for key in DATA_KEYS}
+        try:
+            api.Recognize()
+            iterator = api.GetIterator()
+            level = tesserocr.RIL.WORD
+            block = par = line = word = 0
+            while iterator is not None:
+                if iterator.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line, word = block + 1, 0, 0, 0
+                if iterator.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line, word = par + 1, 0, 0
+                if iterator.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line, word = line + 1, 0
+                word += 1
+                box = iterator.BoundingBox(level)
+                if box is not None:
+                    left, top, right, bottom = box
+                    row = (5, 1, block, par, line, word, left, top, right - left, bottom - top,
+                           iterator.Confidence(level), iterator.GetUTF8Text(level) or "")
+                    for key, value in zip(DATA_KEYS, row):
+                        data[key].append(value)
+                if not iterator.Next(level):
+                    break
+        finally:
+            api.Clear()
+        return data
+
+    def close(self):
+        with self._lock:
+            engines, self._engines = self._engines, []
+        for api in engines:
+            api.End()
+
+
+def create_backend(name: str = "auto", tessdata_path: Optional[str] = None, lang: str = "eng") -> OCRBackend:
+    """Build the configured backend; `auto` prefers tesserocr and falls back to pytesseract"""
+    if tessdata_path and not os.path.isdir(tessdata_path):
+        tessdata_path = None
+    if name == "pytesseract":
+        return PytesseractBackend()
+    if name == "tesserocr":
+        return TesserocrBackend(tessdata_path)
+    if name == "auto":
+        try:
+            backend = TesserocrBackend(tessdata_path)
+        except ImportError:
+            return PytesseractBackend()
+        return backend if backend.has_language(lang) else PytesseractBackend()
+    raise ValueError(f"Unknown OCR backend: {name}")
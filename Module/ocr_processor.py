@@ -1,18 +1,63 @@
-import cv2
 import numpy as np
-import pytesseract
 import json
 import os
 import re
-from PIL import Image, ImageEnhance
-from typing import Dict, Any, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from PIL import Image
+from typing import Dict, Any, List, Optional, Tuple, Union
 from .ner_processor import NERProcessor
+from .image_loader import ImageLoader
+from .ocr_backends import OCRBackend, OCRResult, create_backend
+from .concurrency import OCRGovernor
+from .quality import QualityGate
+from .near_duplicates import CardFingerprint, NearDuplicateIndex
+from .preprocessing import PreprocessingPipeline, deskew, find_card, resize, to_grayscale
+from .templates import CardTemplate, TemplateRegistry
+from .model_registry import ModelRegistry
+from .extraction_result import ExtractionResult
+from .field_extractor import FieldExtractor
+from .metrics import stage
+from .profiling import RequestProfiler
+
+ImageSource = Union[str, bytes, bytearray, memoryview, Image.Image, np.ndarray]
+
+CARD_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789:@._- "
+
+@dataclass
+class OCRPass:
+    """One step of the OCR cascade: how the page is preprocessed and segmented"""
+
+    name: str
+    preprocessing: PreprocessingPipeline
+    tesseract_config: str
+    field_psm: int = 7  # Template field crops
+    field_scale: float = 1.0
+
+    def describe(self) -> str:
+        return f"{self.name}:{self.tesseract_config}:{self.preprocessing.describe()}:{self.field_psm}:{self.field_scale}"
 
 class OCRProcessor:
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", ner: NERProcessor = None, registry: ModelRegistry = None):
         self.config = self._load_config(config_path)
         self.setup_tesseract()
-        self.ner = NERProcessor(model_path=self.config.get("ner", {}).get("model_path", "trained_models/ner"))
+        self.preprocessing = PreprocessingPipeline.from_config(self.config["preprocessing"])
+        self.templates = TemplateRegistry.from_config(self.config["templates"])
+        self.passes = self._build_passes(self.config["cascade"])
+        self.loader = ImageLoader.from_config(self.config["loader"], self._decode_width())
+        self.quality = QualityGate.from_config(self.config["quality"])
+        self.duplicates = NearDuplicateIndex.from_config(self.config["near_duplicate"])
+        self._field_pool: Optional[ThreadPoolExecutor] = None
+        self._field_pool_lock = threading.Lock()
+        ner_config = self.config.get("ner", {})
+        self.ner = ner or NERProcessor(
+            model_path=ner_config.get("model_path", "trained_models/ner"),
+            registry=registry,
+            batch_size=ner_config.get("batch_size", 64),
+            n_process=ner_config.get("n_process", 1),
+            fields=FieldExtractor.from_config(ner_config)
+        )
     
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         default_config = {
@@ -22,14 +67,39 @@ class OCRProcessor:
                 "lang": "eng",
                 "config_params": "--dpi 300 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-,. "
             },
+            "templates": {
+                "enabled": False,
+                "dir": "resource/templates",
+                "max_workers": None,  # One thread per OCR slot
+                "crop_scale": 1.0
+            },
             "preprocessing": {
-                "resize_width": 2400,  # Increased resolution
-                "threshold_method": "adaptive",
-                "denoise": True,
-                "sharpen": True,
-                "deskew": True,
-                "morph_cleanup": True
-            }
+                "preset": "accurate",  # Stage list, see Module/preprocessing.py
+                "resize_width": 1200,
+                "threshold_method": "otsu"
+            },
+            "cascade": {
+                "enabled": False,
+                "passes": []
+            },
+            "concurrency": {
+                "max_concurrent": None,
+                "thread_limit": None
+            },
+            "loader": {
+                "max_megapixels": 50,
+                "reduced_decode": True
+            },
+            "quality": {
+                "enabled": False,
+                "max_side": 640  # Width the scores are measured at
+            },
+            "near_duplicate": {
+                "enabled": False,
+                "max_distance": 128,  # Hash bits out of 8192 for a candidate
+                "max_difference": 40  # Grey levels any patch of a duplicate may differ by
+            },
+            "confidence_threshold": 0.7
         }
         
         if os.path.exists(config_path):
@@ -40,6 +110,28 @@ class OCRProcessor:
                     default_config["tesseract"].update(loaded_config["tesseract"])
                 if "preprocessing" in loaded_config:
                     default_config["preprocessing"].update(loaded_config["preprocessing"])
+                if "templates" in loaded_config.get("ocr", {}):
+                    default_config["templates"].update(loaded_config["ocr"]["templates"])
+                if "preprocessing" in loaded_config.get("ocr", {}):
+                    default_config["preprocessing"].update(loaded_config["ocr"]["preprocessing"])
+                if "cascade" in loaded_config.get("ocr", {}):
+                    default_config["cascade"].update(loaded_config["ocr"]["cascade"])
+                if "concurrency" in loaded_config.get("ocr", {}):
+                    default_config["concurrency"].update(loaded_config["ocr"]["concurrency"])
+                if "loader" in loaded_config.get("ocr", {}):
+                    default_config["loader"].update(loaded_config["ocr"]["loader"])
+                if "quality" in loaded_config.get("ocr", {}):
+                    default_config["quality"].update(loaded_config["ocr"]["quality"])
+                # Files read from disk (batch jobs) get the same size limit as uploads
+                default_config["loader"].setdefault(
+                    "max_file_size_mb", loaded_config.get("storage", {}).get("max_file_size_mb")
+                )
+                if "near_duplicate" in loaded_config.get("cache", {}):
+                    default_config["near_duplicate"].update(loaded_config["cache"]["near_duplicate"])
+                if "confidence_threshold" in loaded_config.get("ocr", {}):
+                    default_config["confidence_threshold"] = loaded_config["ocr"]["confidence_threshold"]
+                if "ner" in loaded_config:
+                    default_config["ner"] = loaded_config["ner"]
                 return default_config
         return default_config
 
@@ -52,74 +144,84 @@ class OCRProcessor:
             f'--psm {tesseract_config.get("psm", 4)} '
             f'{tesseract_config.get("config_params", "--dpi 300")}'
         )
+        self.card_tesseract_config = self.card_config(6)
+
+        # Sets the OpenMP thread limit, which libtesseract reads when it is loaded below
+        self.governor = OCRGovernor.from_config(self.config["concurrency"])
+
+        # In-process libtesseract when tesserocr is installed, the tesseract binary otherwise
+        self.ocr_backend: OCRBackend = create_backend(
+            tesseract_config.get("backend", "auto"),
+            tesseract_config.get("tessdata_path") or os.getenv("TESSDATA_PREFIX"),
+            tesseract_config.get("lang", "eng")
+        )
+
+    @staticmethod
+    def card_config(psm: int) -> str:
+        """Tesseract config for a whole card page with the given page segmentation mode"""
+        return f'--oem 3 --psm {psm} -c tessedit_char_whitelist="{CARD_WHITELIST}"'
+
+    def _build_passes(self, cascade_config: Dict[str, Any]) -> List[OCRPass]:
+        """The OCR passes to try in order; a single pass with the base settings when the cascade is off"""
+        crop_scale = self.config["templates"].get("crop_scale", 1.0)
+        if not cascade_config.get("enabled", False) or not cascade_config.get("passes"):
+            return [OCRPass("default", self.preprocessing, self.card_tesseract_config, field_scale=crop_scale)]
+
+        base = self.config["preprocessing"]
+        passes = []
+        for settings in cascade_config["passes"]:
+            preprocessing = self.preprocessing
+            if "preprocessing" in settings:
+                # A pass names its own stage list; only the sizing and binarisation defaults are inherited
+                preprocessing = PreprocessingPipeline.from_config({
+                    "resize_width": base.get("resize_width", 1200),
+                    "threshold_method": base.get("threshold_method", "otsu"),
+                    **settings["preprocessing"]
+                })
+            passes.append(OCRPass(
+                name=settings["name"],
+                preprocessing=preprocessing,
+                tesseract_config=self.card_config(settings.get("psm", 6)),
+                field_psm=settings.get("field_psm", 7),
+                field_scale=settings.get("field_scale", crop_scale)
+            ))
+        return passes
+
+    def _decode_width(self) -> Optional[int]:
+        """Narrowest image every pass and template can work from, or None if one needs full resolution"""
+        widths = [self.preprocessing.working_width] + [ocr_pass.preprocessing.working_width for ocr_pass in self.passes]
+        if None in widths:
+            return None
+        if self.templates is not None:
+            widths += [template.size[0] for template in self.templates.templates]
+        return max(widths)
+
+    def load_image(self, source: ImageSource) -> Union[Image.Image, np.ndarray]:
+        """Decode a path or raw bytes to a reduced grayscale array; PIL images and OpenCV arrays pass through"""
+        if isinstance(source, (Image.Image, np.ndarray)):
+            return source
+        return self.loader.load(source)
 
     def deskew(self, image: np.ndarray) -> np.ndarray:
         """Deskew the image if it's rotated"""
-        coords = np.column_stack(np.where(image > 0))
-        angle = cv2.minAreaRect(coords)[-1]
-        if angle < -45:
-            angle = 90 + angle
-        if angle > 0:
-            (h, w) = image.shape[:2]
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            image = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-        return image
-
-    def preprocess_image(self, image: Image) -> Image:
-        """Preprocess image for better OCR results"""
-        # Convert to grayscale
-        image = image.convert('L')
-        
-        # Increase contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
-        
-        # Apply thresholding
-        image = image.point(lambda x: 0 if x < 128 else 255, '1')
-        
-        # Resize if too small
-        if image.width < 1000 or image.height < 600:
-            ratio = max(1000/image.width, 600/image.height)
-            new_size = (int(image.width * ratio), int(image.height * ratio))
-            image = image.resize(new_size, Image.LANCZOS)
-        
-        return image
+        return deskew(image)
+
+    def preprocess_image(self, image: Union[Image.Image, np.ndarray], profiler: Optional[RequestProfiler] = None) -> np.ndarray:
+        """Run the configured preprocessing stages and return a grayscale array for OCR"""
+        return self.preprocessing(image, profiler)
 
-    def extract_text(self, image_path: str) -> Tuple[str, float]:
+    def extract_text(self, image: ImageSource) -> Tuple[str, float]:
         """Extract text from image with improved confidence calculation"""
-        # Preprocess image
-        processed_img = self.preprocess_image(Image.open(image_path))
-        
-        # Convert OpenCV image to PIL Image
-        pil_img = processed_img
-        
-        # Get OCR data including confidence
-        ocr_data = pytesseract.image_to_data(
-            pil_img, 
-            config=self.tesseract_config, 
-            output_type=pytesseract.Output.DICT
-        )
-        
-        # Extract text and calculate weighted confidence
-        text_parts = []
-        confidences = []
-        word_lengths = []
+        # Same single recognition as the card pipeline's first pass
+        page = self._read_page(self.load_image(image))
         
-        for i in range(len(ocr_data["text"])):
-            if int(ocr_data["conf"][i]) > 30:  # Increased confidence threshold
-                text = ocr_data["text"][i].strip()
-                if text:  # Only process non-empty text
-                    text_parts.append(text)
-                    confidences.append(float(ocr_data["conf"][i]))
-                    word_lengths.append(len(text))
-        
-        if not confidences:
+        # Keep confident words and calculate length-weighted confidence
+        keep = page.confidences > 30
+        if not keep.any():
             return "", 0.0
-        
-        # Calculate length-weighted confidence
-        total_length = sum(word_lengths)
-        weighted_confidence = sum(conf * length for conf, length in zip(confidences, word_lengths)) / total_length if total_length > 0 else 0.0
+        text_parts = [word for word, kept in zip(page.words, keep) if kept]
+        word_lengths = np.array([len(word) for word in text_parts], np.float32)
+        weighted_confidence = float(np.dot(page.confidences[keep], word_lengths) / word_lengths.sum())
         
         # Join text parts with proper spacing
         extracted_text = " ".join(text_parts)
@@ -162,27 +264,287 @@ class OCRProcessor:
         
         return extracted_fields
 
-    def process_id_card(self, image_path: str) -> Dict:
-        """Process ID card image and extract information"""
-        # Load and preprocess image
-        image = Image.open(image_path)
-        processed_image = self.preprocess_image(image)
-        
-        # Configure Tesseract
-        custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist="ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789:@._- "'
-        
-        # Extract text
-        text = pytesseract.image_to_string(processed_image, config=custom_config)
-        
-        # Process with NER
-        ner_results = self.ner.process_text(text)
+    def read_text(self, image: ImageSource, profiler: Optional[RequestProfiler] = None) -> str:
+        """Run OCR over an ID card image and return the raw text"""
+        with stage("decode", profiler):
+            image = self.load_image(image)
+        return self._read_page(image, profiler).text
+
+    def _read_page(self, image: Union[Image.Image, np.ndarray], profiler: Optional[RequestProfiler] = None, ocr_pass: Optional[OCRPass] = None) -> OCRResult:
+        ocr_pass = ocr_pass or self.passes[0]
+        with stage("preprocess", profiler):
+            processed_image = ocr_pass.preprocessing(image, profiler)
         
+        # Text, layout and word confidences all come from this one recognition
+        with stage("tesseract", profiler), self.governor.slot():
+            return self.ocr_backend.image_to_result(processed_image, ocr_pass.tesseract_config)
+
+    def read_card(
+        self,
+        image: ImageSource,
+        profiler: Optional[RequestProfiler] = None,
+        threshold: Optional[float] = None
+    ) -> Union[OCRResult, ExtractionResult]:
+        """OCR a card with the first pass: fields straight from a matching template, otherwise the page words for NER.
+
+        Images the quality gate refuses come back as a rejected result, and new
+        copies of a card in the near-duplicate index as its stored result, both
+        without any OCR.
+        """
+        with stage("decode", profiler):
+            image = self.load_image(image)
+        screened, _ = self.screen(image, profiler, threshold)
+        if screened is not None:
+            return screened
+        return self._first_pass(image, profiler)
+
+    def _first_pass(self, image: Union[Image.Image, np.ndarray], profiler: Optional[RequestProfiler] = None) -> Union[OCRResult, ExtractionResult]:
+        matched = self.match_template(image, profiler)
+        if matched is not None:
+            return self.read_fields(*matched, profiler)
+        return self._read_page(image, profiler)
+
+    def screen(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        profiler: Optional[RequestProfiler] = None,
+        threshold: Optional[float] = None
+    ) -> Tuple[Optional[ExtractionResult], Optional[CardFingerprint]]:
+        """Checks before OCR: the finished result when the card needs no OCR, and its near-duplicate fingerprint"""
+        rejection = self.check_quality(image, profiler)
+        if rejection is not None:
+            return ExtractionResult(raw_text="", rejection=rejection), None
+        if self.duplicates is None:
+            return None, None
+        with stage("near_duplicate", profiler):
+            fingerprint = CardFingerprint.of(to_grayscale(image))
+            return self.duplicates.lookup(fingerprint, self.duplicate_settings(threshold)), fingerprint
+
+    def remember(
+        self,
+        image: ImageSource,
+        result: ExtractionResult,
+        threshold: Optional[float] = None,
+        fingerprint: Optional[CardFingerprint] = None
+    ):
+        """Add a freshly extracted result to the near-duplicate index"""
+        if self.duplicates is None or result.rejection is not None or result.near_duplicate:
+            return
+        if fingerprint is None:
+            fingerprint = CardFingerprint.of(to_grayscale(self.load_image(image)))
+        self.duplicates.add(fingerprint, self.duplicate_settings(threshold), result)
+
+    def check_quality(self, image: Union[Image.Image, np.ndarray], profiler: Optional[RequestProfiler] = None) -> Optional[Dict[str, Any]]:
+        """The quality gate's rejection for a decoded image, or None when it passes or the gate is off"""
+        if self.quality is None:
+            return None
+        with stage("quality", profiler):
+            return self.quality.check(to_grayscale(image))
+
+    def match_template(self, image: Union[Image.Image, np.ndarray], profiler: Optional[RequestProfiler] = None) -> Optional[Tuple[CardTemplate, np.ndarray, np.ndarray]]:
+        if self.templates is None:
+            return None
+        with stage("template_match", profiler):
+            gray = to_grayscale(image)
+            matched = self.templates.match(gray)
+            if matched is None:
+                # A photo of a card on a desk: find the card and flatten it onto the template canvas
+                corners = find_card(gray)
+                if corners is not None:
+                    matched = self.templates.match(gray, corners)
+            return matched
+
+    def read_fields(
+        self,
+        template: CardTemplate,
+        card: np.ndarray,
+        ink: np.ndarray,
+        profiler: Optional[RequestProfiler] = None,
+        ocr_pass: Optional[OCRPass] = None,
+        names: Optional[List[str]] = None
+    ) -> ExtractionResult:
+        """Read each field box of an aligned card (or only `names`) as one text line, in parallel"""
+        ocr_pass = ocr_pass or self.passes[0]
+        items = [item for item in template.fields if names is None or item.name in names]
+        with stage("preprocess", profiler):
+            crops = [self._field_crop(card, ink, item.box, ocr_pass.field_scale) for item in items]
+        # Field crops are read on pool threads, which a profiled request has to profile separately
+        recognize = profiler.in_thread(self._recognize) if profiler is not None else self._recognize
+        with stage("tesseract", profiler):
+            pages = list(self._field_executor().map(
+                recognize,
+                [(crop, item.tesseract_config(ocr_pass.field_psm)) for crop, item in zip(crops, items)]
+            ))
+
+        # Crop text is cleaned and validated against `ner.fields` like free-text values
+        specs = self.ner.fields
+        fields = {}
+        for item, page in zip(items, pages):
+            text = specs.normalise(item.name, " ".join(page.words)) if len(page) else None
+            if text is None:
+                continue
+            fields[item.name] = {
+                "text": text,
+                "confidence": item.score(text, page.mean_confidence(), specs.has_shape(item.name, text))
+            }
+        return self.build_result(self._field_lines(template, fields), fields, ocr_pass.name)
+
+    @staticmethod
+    def _field_lines(template: CardTemplate, fields: Dict[str, Dict]) -> str:
+        """Raw text for a template read: one "Label: value" line per field found"""
+        return "\n".join(f"{item.label} {fields[item.name]['text']}" for item in template.fields if item.name in fields)
+
+    @staticmethod
+    def _field_crop(card: np.ndarray, ink: np.ndarray, box: Tuple[int, int, int, int], scale: float = 1.0) -> np.ndarray:
+        """Trim a field box to its text and pad it with background for single-line OCR"""
+        import cv2
+
+        left, top, right, bottom = box
+        region = ink[top:bottom, left:right]
+        rows = np.flatnonzero(region.any(axis=1))
+        cols = np.flatnonzero(region.any(axis=0))
+        if len(rows) and len(cols):
+            # Most of a value box is empty canvas; tesseract time grows with the crop size
+            top, bottom = top + max(rows[0] - 2, 0), top + rows[-1] + 3
+            left, right = left + max(cols[0] - 2, 0), left + cols[-1] + 3
+        crop = card[top:bottom, left:right]
+        if scale != 1.0:
+            crop = resize(crop, width=int(crop.shape[1] * scale))
+        return cv2.copyMakeBorder(crop, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=255)
+
+    def _recognize(self, args: Tuple[np.ndarray, str]) -> OCRResult:
+        with self.governor.slot():
+            return self.ocr_backend.image_to_result(*args)
+
+    def _field_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so a pre-fork parent never starts threads
+        if self._field_pool is None:
+            with self._field_pool_lock:
+                if self._field_pool is None:
+                    self._field_pool = ThreadPoolExecutor(
+                        max_workers=self.config["templates"].get("max_workers") or self.governor.slots,
+                        thread_name_prefix="ocr-field"
+                    )
+        return self._field_pool
+
+    def settings(self) -> str:
+        """Every OCR setting that changes the result for an image"""
+        settings = "|".join(ocr_pass.describe() for ocr_pass in self.passes) + f"|{self.loader.describe()}"
+        if self.templates is not None:
+            settings += f"|templates={self.templates.describe()}"
+        if self.quality is not None:
+            settings += f"|quality={self.quality.describe()}"
+        return settings + f"|fields={self.ner.fields.describe()}"
+
+    def duplicate_settings(self, threshold: Optional[float] = None) -> str:
+        """Near-duplicate index entries only match lookups made with the same settings, model and threshold"""
+        if threshold is None:
+            threshold = self.config["confidence_threshold"]
+        return f"{self.settings()}|{self.ner.model_version}|{threshold}"
+
+    def build_result(self, text: str, ner_results: Dict, ocr_pass: Optional[str] = None) -> ExtractionResult:
+        """Wrap OCR text and NER output into a single extraction result"""
         # Calculate overall confidence
         confidences = [v.get('confidence', 0) for v in ner_results.values() if isinstance(v, dict)]
         overall_confidence = sum(confidences) / len(confidences) if confidences else 0
+        document_type = self.ner.fields.document_type(ner_results)
         
-        return {
-            "extracted_fields": ner_results,
-            "overall_confidence": overall_confidence,
-            "raw_text": text
-        } 
\ No newline at end of file
+        return ExtractionResult(
+            raw_text=text,
+            fields=ner_results,
+            overall_confidence=overall_confidence,
+            ocr_pass=ocr_pass or self.passes[0].name,
+            document_type=document_type,
+            required_fields=self.ner.fields.required_fields(document_type)
+        )
+
+    def missing_fields(self, result: ExtractionResult, threshold: Optional[float] = None) -> List[str]:
+        """Required fields the result has not extracted at or above the threshold"""
+        if threshold is None:
+            threshold = self.config["confidence_threshold"]
+        return result.missing_fields(threshold)
+
+    def escalate(
+        self,
+        image: ImageSource,
+        result: ExtractionResult,
+        threshold: Optional[float] = None,
+        profiler: Optional[RequestProfiler] = None
+    ) -> ExtractionResult:
+        """Retry a first-pass result with the heavier passes until every required field clears the threshold.
+
+        Template cards re-read only the failing field boxes; other cards re-read
+        the page. A field keeps the most confident value any pass produced, and
+        `ocr_pass` names the last pass that ran. Escalation stops early when a
+        pass recovers none of the missing fields.
+        """
+        missing = self.missing_fields(result, threshold)
+        if not missing or len(self.passes) < 2 or result.rejection is not None or result.near_duplicate:
+            return result
+
+        with stage("decode", profiler):
+            image = self.load_image(image)
+        matched = self.match_template(image, profiler)
+        for ocr_pass in self.passes[1:]:
+            with stage(f"pass_{ocr_pass.name}", profiler):
+                if matched is not None:
+                    candidate = self.read_fields(*matched, profiler, ocr_pass, missing)
+                else:
+                    candidate = self.read_page_fields(self._read_page(image, profiler, ocr_pass), profiler)
+
+            fields = dict(result.fields)
+            for name, value in candidate.fields.items():
+                if value["confidence"] > fields.get(name, {}).get("confidence", 0):
+                    fields[name] = value
+            text = self._field_lines(matched[0], fields) if matched is not None else candidate.raw_text
+            result = self.build_result(text, fields, ocr_pass.name)
+
+            still_missing = self.missing_fields(result, threshold)
+            # A pass that recovers nothing suggests the field is absent from the card, not misread
+            if not still_missing or len(still_missing) == len(missing):
+                break
+            missing = still_missing
+        return result
+
+    def process_id_card(
+        self,
+        image: ImageSource,
+        profiler: Optional[RequestProfiler] = None,
+        threshold: Optional[float] = None,
+        index: bool = True
+    ) -> ExtractionResult:
+        """Process ID card image and extract information.
+
+        With `index=False` the result is not added to the near-duplicate index,
+        e.g. for synthetic cards that must never answer a real request.
+        """
+        with stage("decode", profiler):
+            image = self.load_image(image)
+        screened, fingerprint = self.screen(image, profiler, threshold)
+        if screened is not None:
+            return screened
+        page = self._first_pass(image, profiler)
+        if isinstance(page, ExtractionResult):
+            # Template fields are read from their own boxes and need no NER
+            result = page
+        else:
+            # Process with NER
+            result = self.read_page_fields(page, profiler)
+        result = self.escalate(image, result, threshold, profiler)
+        if index:
+            self.remember(image, result, threshold, fingerprint)
+        return result
+
+    def read_page_fields(self, page: OCRResult, profiler: Optional[RequestProfiler] = None) -> ExtractionResult:
+        """Run NER over one page of OCR words, scoring fields with the confidences of the words they came from"""
+        text = page.text
+        return self.build_result(text, self.ner.process_text(text, profiler, page.confidences))
+
+    def process_texts(self, texts: List[Union[str, OCRResult]]) -> List[ExtractionResult]:
+        """Run NER over already OCR'd texts (or pages of OCR words) in one batch"""
+        pages = [page.text if isinstance(page, OCRResult) else page for page in texts]
+        confidences = [page.confidences if isinstance(page, OCRResult) else None for page in texts]
+        return [
+            self.build_result(text, ner_results)
+            for text, ner_results in zip(pages, self.ner.process_texts(pages, confidences))
+        ]
@@ -0,0 +1,433 @@
+"""
+Config-driven image preprocessing for OCR.
+
+A PreprocessingPipeline is an ordered list of stages that each take and return
+a single-channel uint8 ndarray. The stage list comes from a preset (`fast` or
+`accurate`); each stage can then be switched off or tuned from the
+`ocr.preprocessing` section of config.json. Every stage is timed into the
+stage latency histogram as `preprocess_<name>`.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+from .metrics import stage
+
+Stage = Callable[[np.ndarray], np.ndarray]
+
+# Ordered stage names and their settings for each preset
+PRESETS: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    "fast": [
+        ("card_crop", {}),
+        ("deskew", {}),
+        ("resize", {"interpolation": "linear"}),
+        ("contrast_enhancement", {"method": "stretch"}),
+        ("threshold", {"method": "otsu"})
+    ],
+    "accurate": [
+        ("card_crop", {}),
+        ("border_removal", {}),
+        ("deskew", {}),
+        ("resize", {"interpolation": "cubic"}),
+        ("denoise", {"method": "median"}),
+        ("contrast_enhancement", {"method": "clahe"}),
+        ("threshold", {"method": "otsu"}),
+        ("morph_cleanup", {})
+    ]
+}
+
+# Config keys that are not stage toggles
+SETTINGS = ("preset", "resize_width", "threshold_method")
+
+
+def to_grayscale(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    """Single-channel uint8 array from a PIL image or a BGR/BGRA/gray OpenCV array"""
+    import cv2
+
+    if isinstance(image, Image.Image):
+        return np.asarray(image if image.mode == "L" else image.convert("L"))
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def border_removal(image: np.ndarray, tolerance: int = 24, margin: int = 4) -> np.ndarray:
+    """Crop away a uniform border (scanner bed, background) around the card"""
+    border = np.concatenate((image[0], image[-1], image[:, 0], image[:, -1]))
+    background = int(np.median(border))
+    mask = np.abs(image.astype(np.int16) - background) > tolerance
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if not len(rows) or not len(cols):
+        return image
+    top, bottom = max(rows[0] - margin, 0), min(rows[-1] + margin + 1, image.shape[0])
+    left, right = max(cols[0] - margin, 0), min(cols[-1] + margin + 1, image.shape[1])
+    return image[top:bottom, left:right]
+
+
+def downscale(image: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """Copy scaled down to at most `max_side` pixels, and the scale applied"""
+    import cv2
+
+    h, w = image.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1:
+        return image, 1.0
+    return cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA), scale
+
+
+def _order_corners(quad: np.ndarray) -> np.ndarray:
+    """Corners as top-left, top-right, bottom-right, bottom-left with the long sides horizontal"""
+    center = quad.mean(axis=0)
+    angles = np.arctan2(quad[:, 1] - center[1], quad[:, 0] - center[0])
+    # Clockwise on screen (y points down), starting from the corner nearest the top left
+    quad = quad[np.argsort(angles)]
+    quad = np.roll(quad, -int(np.argmin(quad.sum(axis=1))), axis=0)
+    top, left = np.linalg.norm(quad[1] - quad[0]), np.linalg.norm(quad[3] - quad[0])
+    if left > top:
+        # Portrait in the photo: start one corner later so the long side becomes the top edge
+        quad = np.roll(quad, -1, axis=0)
+    return quad.astype(np.float32)
+
+
+def find_card(image: np.ndarray, max_side: int = 400, min_area: float = 0.08, max_area: float = 0.95) -> Optional[np.ndarray]:
+    """Corners of a card photographed against a background, or None.
+
+    Candidates are looked for on a copy at most `max_side` pixels wide: the
+    outlines of closed edge contours, and the regions Otsu separates from the
+    background (for a light card on a light desk, where edges are faint). A
+    candidate must reduce to four corners and cover between `min_area` and
+    `max_area` of the frame, so a scan that is the card itself finds nothing.
+    Of those, the region that best fills its quadrilateral wins: an outline
+    merged with clutter on the desk fills its corners poorly.
+    """
+    import cv2
+
+    small, scale = downscale(image, max_side)
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    edges = cv2.dilate(cv2.Canny(blurred, 30, 90), np.ones((3, 3), np.uint8))
+    _, bright = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    frame = small.shape[0] * small.shape[1]
+
+    best, best_fill = None, 0.0
+    for mask in (edges, bright, 255 - bright):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:3]:
+            hull = cv2.convexHull(contour)
+            area = cv2.contourArea(hull)
+            if area < min_area * frame:
+                break
+            if area > max_area * frame:
+                continue
+            perimeter = cv2.arcLength(hull, True)
+            for epsilon in (0.02, 0.04):
+                quad = cv2.approxPolyDP(hull, epsilon * perimeter, True)
+                if len(quad) == 4:
+                    region, corners = cv2.contourArea(contour), cv2.contourArea(quad)
+                    fill = min(region, corners) / max(region, corners, 1.0)
+                    if fill > best_fill:
+                        best, best_fill = quad, fill
+                    break
+    if best is None:
+        return None
+    corners = _order_corners(best.reshape(4, 2) / scale)
+    if scale < 1:
+        # Corners found on the small copy are a few pixels off at full size (and the edge
+        # mask is dilated outwards); snap them to the card's corners in the full image
+        window = int(np.ceil(2 / scale))
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, 20, 0.1)
+        cv2.cornerSubPix(image, corners.reshape(-1, 1, 2), (window, window), (-1, -1), criteria)
+    return corners
+
+
+def warp_card(image: np.ndarray, corners: np.ndarray, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """Perspective-correct the card inside `corners` to `size` (width, height).
+
+    Without a size the card keeps the resolution it was photographed at: the
+    longer of each pair of opposite edges.
+    """
+    import cv2
+
+    if size is None:
+        tl, tr, br, bl = corners
+        width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+        height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+        size = (max(1, int(round(width))), max(1, int(round(height))))
+    width, height = size
+    target = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def card_crop(image: np.ndarray, width: Optional[int] = None, max_side: int = 400, min_area: float = 0.08) -> np.ndarray:
+    """Cut a photographed card out of its background and flatten its perspective.
+
+    The card is warped to `width` pixels wide (its photographed width by
+    default) at its own aspect ratio. When no card outline is found, as for
+    scans that are the card itself, the image passes through unchanged for
+    the stages after it (border removal in the accurate preset).
+    """
+    corners = find_card(image, max_side, min_area)
+    if corners is None:
+        return image
+    card = warp_card(image, corners)
+    if width:
+        card = resize(card, width)
+    return card
+
+
+def _small_ink(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Otsu ink mask (1 = dark text) of a copy scaled down to at most `max_side` pixels"""
+    import cv2
+
+    image, _ = downscale(image, max_side)
+    return cv2.threshold(image, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+
+def _ink_points(ink: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Coordinates of the ink pixels relative to the mask centre, and the longest possible projection"""
+    ys, xs = np.nonzero(ink)
+    h, w = ink.shape
+    return (ys - h // 2).astype(np.float32), (xs - w // 2).astype(np.float32), int(np.hypot(h, w)) + 2
+
+
+def _angle_sharpness(points: Tuple[np.ndarray, np.ndarray, int], angles: np.ndarray) -> np.ndarray:
+    """Row projection sharpness of the ink rotated by each angle (degrees, counter-clockwise).
+
+    Sharpness is the sum of squared steps between neighbouring rows, highest
+    when text lines lie along the rows. The ink pixels are projected onto the
+    rotated rows for every angle with one bincount instead of warping the mask
+    once per angle.
+    """
+    ys, xs, size = points
+    if not len(ys):
+        return np.zeros(len(angles))
+    theta = np.deg2rad(angles).astype(np.float32)[:, None]
+    rows = ys * np.cos(theta)
+    rows -= xs * np.sin(theta)
+    # Shift each angle's rows into its own block of bins; +0.5 rounds on the cast
+    rows += (size // 2 + 0.5 + np.arange(len(angles), dtype=np.float32) * size)[:, None]
+    profiles = np.bincount(rows.astype(np.intp).ravel(), minlength=len(angles) * size).reshape(len(angles), size)
+    steps = np.diff(profiles, axis=1)
+    return (steps * steps).sum(axis=1)
+
+
+def _best_angle(points: Tuple[np.ndarray, np.ndarray, int], center: float, span: float, step: float) -> Tuple[float, float]:
+    """Sharpest angle within `span` degrees of `center`, and its sharpness"""
+    angles = np.arange(center - span, center + span + step / 2, step)
+    sharpness = _angle_sharpness(points, angles)
+    best = int(np.argmax(sharpness))
+    return float(angles[best]), float(sharpness[best])
+
+
+def estimate_skew(ink: np.ndarray, max_angle: float = 15.0, step: float = 1.0, fine_step: float = 0.1) -> float:
+    """Counter-clockwise rotation in degrees that makes the text lines of an ink mask horizontal"""
+    points = _ink_points(ink)
+    coarse, _ = _best_angle(points, 0.0, max_angle, step)
+    return _best_angle(points, coarse, step, fine_step)[0]
+
+
+def _upside_down(ink: np.ndarray) -> bool:
+    """Whether horizontal text is upside down.
+
+    Latin text has more ascenders (capitals, b, d, h, l, t) than descenders
+    (g, p, y), so upright lines carry more ink above their x-height band than
+    below it.
+    """
+    profile = ink.sum(axis=1)
+    rows = np.concatenate(([0], (profile > 0).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(rows))
+    above = below = 0
+    for top, bottom in zip(edges[::2], edges[1::2]):
+        line = profile[top:bottom]
+        if len(line) < 5:
+            continue
+        core = np.flatnonzero(line >= line.max() / 2)
+        above += int(line[:core[0]].sum())
+        below += int(line[core[-1] + 1:].sum())
+    return below > above
+
+
+def estimate_orientation(ink: np.ndarray, max_angle: float = 15.0) -> Tuple[int, float]:
+    """Quarter turns (counter-clockwise) and then the skew angle that make an ink mask upright"""
+    import cv2
+
+    turns = 0
+    points = _ink_points(ink)
+    coarse, sharpness = _best_angle(points, 0.0, max_angle, 1.0)
+    # The same ink turned a quarter counter-clockwise, as np.rot90 would
+    ys, xs, size = points
+    sideways = (-xs, ys, size)
+    sideways_coarse, sideways_sharpness = _best_angle(sideways, 0.0, max_angle, 1.0)
+    if sideways_sharpness > sharpness:
+        # Text lines run down the columns: the card is on its side
+        ink, points, coarse, turns = np.ascontiguousarray(np.rot90(ink)), sideways, sideways_coarse, 1
+    angle = _best_angle(points, coarse, 1.0, 0.1)[0]
+    if angle:
+        h, w = ink.shape
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        ink = cv2.warpAffine(ink, matrix, (w, h), flags=cv2.INTER_NEAREST)
+    if _upside_down(ink):
+        turns += 2
+    return turns % 4, angle
+
+
+def deskew(
+    image: np.ndarray,
+    min_angle: float = 0.5,
+    max_angle: float = 15.0,
+    max_side: int = 400,
+    orientation: bool = True
+) -> np.ndarray:
+    """Turn dark text on a light background upright and rotate its lines horizontal.
+
+    Orientation (90/180/270 degrees) and skew are estimated on a copy at most
+    `max_side` pixels wide; the full image is only warped when the skew is at
+    least `min_angle` degrees.
+    """
+    import cv2
+
+    ink = _small_ink(image, max_side)
+    if orientation:
+        turns, angle = estimate_orientation(ink, max_angle)
+    else:
+        turns, angle = 0, estimate_skew(ink, max_angle)
+    if turns:
+        image = np.ascontiguousarray(np.rot90(image, turns))
+    if abs(angle) < min_angle:
+        return image
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+def resize(image: np.ndarray, width: int = 1200, interpolation: str = "cubic") -> np.ndarray:
+    """Scale to a fixed width before binarisation so edges are interpolated in grayscale"""
+    import cv2
+
+    h, w = image.shape[:2]
+    if not width or w == width:
+        return image
+    if w > width:
+        flag = cv2.INTER_AREA
+    else:
+        flag = cv2.INTER_CUBIC if interpolation == "cubic" else cv2.INTER_LINEAR
+    return cv2.resize(image, (width, max(1, round(h * width / w))), interpolation=flag)
+
+
+def denoise(image: np.ndarray, method: str = "median") -> np.ndarray:
+    import cv2
+
+    if method == "nlmeans":
+        return cv2.fastNlMeansDenoising(image, None, h=10, templateWindowSize=7, searchWindowSize=21)
+    return cv2.medianBlur(image, 3)
+
+
+def contrast_enhancement(image: np.ndarray, method: str = "clahe") -> np.ndarray:
+    import cv2
+
+    if method == "clahe":
+        return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(image)
+    # Linear stretch of the 1st-99th percentile range through a lookup table
+    low, high = np.percentile(image, (1, 99))
+    if high <= low:
+        return image
+    lut = np.clip((np.arange(256) - low) * 255.0 / (high - low), 0, 255).astype(np.uint8)
+    return cv2.LUT(image, lut)
+
+
+def threshold(image: np.ndarray, method: str = "otsu") -> np.ndarray:
+    import cv2
+
+    if method == "adaptive":
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+    if method == "fixed":
+        return np.where(image < 128, 0, 255).astype(np.uint8)
+    return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def morph_cleanup(image: np.ndarray) -> np.ndarray:
+    """Remove isolated specks left by binarisation"""
+    import cv2
+
+    # Opening the inverted image removes small dark dots without thinning strokes much
+    kernel = np.ones((2, 2), np.uint8)
+    return 255 - cv2.morphologyEx(255 - image, cv2.MORPH_OPEN, kernel)
+
+
+STAGES: Dict[str, Callable[..., np.ndarray]] = {
+    "card_crop": card_crop,
+    "border_removal": border_removal,
+    "deskew": deskew,
+    "resize": resize,
+    "denoise": denoise,
+    "contrast_enhancement": contrast_enhancement,
+    "threshold": threshold,
+    "morph_cleanup": morph_cleanup
+}
+
+
+class PreprocessingPipeline:
+    """Ordered grayscale preprocessing stages, each timed separately"""
+
+    def __init__(self, stages: List[Tuple[str, Dict[str, Any]]]):
+        unknown = [name for name, _ in stages if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stages: {unknown}")
+        self.stages = [(name, dict(params)) for name, params in stages]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "PreprocessingPipeline":
+        """Start from the configured preset, then apply per-stage toggles and settings.
+
+        A stage key set to false removes the stage; true keeps the preset's
+        settings, and a dict overrides them. Stages not in the preset can be
+        switched on the same way and run in the standard order.
+        """
+        preset = config.get("preset", "accurate")
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preprocessing preset: {preset}")
+        # Copy each stage's settings so the overrides below never reach the shared presets
+        enabled = {name: dict(params) for name, params in PRESETS[preset]}
+
+        for name, value in config.items():
+            if name in SETTINGS or name not in STAGES:
+                continue
+            if value is False:
+                enabled.pop(name, None)
+            elif value is True:
+                enabled.setdefault(name, {})
+            elif isinstance(value, dict):
+                enabled[name] = {**enabled.get(name, {}), **value}
+
+        if "resize" in enabled and "resize_width" in config:
+            enabled["resize"]["width"] = config["resize_width"]
+        if "threshold" in enabled and "threshold_method" in config:
+            enabled["threshold"]["method"] = config["threshold_method"]
+
+        return cls([(name, enabled[name]) for name in STAGES if name in enabled])
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [name for name, _ in self.stages]
+
+    @property
+    def working_width(self) -> Optional[int]:
+        """Width the resize stage scales to, or None when the pipeline keeps the input resolution"""
+        for name, params in self.stages:
+            if name == "resize":
+                return params.get("width", 1200)
+        return None
+
+    def __call__(self, image: Union[Image.Image, np.ndarray], profiler=None) -> np.ndarray:
+        gray = to_grayscale(image)
+        for name, params in self.stages:
+            with stage(f"preprocess_{name}", profiler):
+                gray = STAGES[name](gray, **params)
+        return gray
+
+    def describe(self) -> str:
+        """Stable summary of the stages, for cache keys"""
+        return ";".join(f"{name}{sorted(params.items())}" for name, params in self.stages)
@@ -0,0 +1,103 @@
+"""
+On-demand profiling of a single extraction request.
+
+A RequestProfiler is passed down the OCRProcessor/NERProcessor call path. It
+collects per-stage wall time (and optionally tracemalloc peaks) and wraps the
+whole call in cProfile so the pstats dump can be inspected offline. cProfile
+only sees the calling thread, so work handed to a thread pool (the per-field
+OCR of template cards) is wrapped with `in_thread` and merged into the dump.
+"""
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# tracemalloc and the stage breakdown are process-wide, so profiled requests run one at a time
+_profile_lock = threading.Lock()
+
+
+class RequestProfiler:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, float] = {}
+        self.memory_peaks: Dict[str, int] = {}
+        self.total_seconds = 0.0
+        self.pstats_path: Optional[str] = None
+        self._profile = cProfile.Profile()
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._thread_lock = threading.Lock()
+        self._running = False
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn under cProfile (and tracemalloc if requested)"""
+        with _profile_lock:
+            started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            start = time.perf_counter()
+            self._running = True
+            self._profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._profile.disable()
+                self._running = False
+                self.total_seconds = time.perf_counter() - start
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def in_thread(self, fn: Callable) -> Callable:
+        """Wrap fn so that calls made on pool threads during `run` are profiled too"""
+        def profiled(*args, **kwargs):
+            if not self._running:
+                return fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._thread_lock:
+                    self._thread_profiles.append(profile)
+        return profiled
+
+    def dump(self, directory: str) -> str:
+        """Write the cProfile data of the request and its pool threads as one pstats file and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pstats"
+        self.pstats_path = os.path.join(directory, filename)
+        stats = pstats.Stats(self._profile)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+        stats.dump_stats(self.pstats_path)
+        return self.pstats_path
+
+    def report(self) -> Dict[str, Any]:
+        report = {
+            "total_seconds": self.total_seconds,
+            "stages": dict(self.stages),
+            "pstats_path": self.pstats_path
+        }
+        if self.trace_memory:
+            report["memory_peak_bytes"] = dict(self.memory_peaks)
+        return report
@@ -0,0 +1,138 @@
+"""
+Cheap image quality checks run before OCR.
+
+Blurry, dark, washed-out or tiny images cannot be read, yet without a gate they
+still pay for every OCR pass and NER before coming back as a failure.
+`QualityGate` scores the decoded grayscale image on a copy scaled to roughly the
+OCR working width, in a few milliseconds, and rejects images that fall outside
+the configured thresholds. The scores are recorded in histograms on /metrics so
+the thresholds can be tuned against real traffic.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .metrics import REGISTRY
+from .preprocessing import downscale
+
+# Pixels at or above this level are clipped white
+SATURATED = 250
+
+SCORE_BUCKETS = {
+    "sharpness": (10, 25, 50, 100, 200, 400, 800, 1600, 3200),
+    "contrast": (20, 40, 60, 80, 100, 150, 200, 255),
+    "resolution": (150, 300, 450, 600, 800, 1200, 2000, 4000),
+    "glare": (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0)
+}
+QUALITY_SCORES = {
+    name: REGISTRY.histogram(f"idcard_image_{name}", f"Image {name} score measured by the quality gate", buckets=buckets)
+    for name, buckets in SCORE_BUCKETS.items()
+}
+QUALITY_REJECTIONS = REGISTRY.counter(
+    "idcard_quality_rejections_total",
+    "Images rejected by the quality gate, by failed check",
+    ("check",)
+)
+
+
+@dataclass
+class QualityReport:
+    sharpness: float  # Variance of the Laplacian at the working width
+    contrast: float  # 1st to 99th percentile grey level range
+    resolution: int  # Longest side of the decoded image in pixels
+    glare: float  # Share of the bright (paper) pixels that are clipped white
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: round(value, 4) for name, value in asdict(self).items()}
+
+
+def assess(image: np.ndarray, max_side: int = 640) -> QualityReport:
+    """Score a grayscale image on a copy at most `max_side` pixels wide"""
+    import cv2
+
+    small, _ = downscale(image, max_side)
+    low, high = np.percentile(small, (1, 99))
+    # Glare is clipped white on paper that is otherwise exposed below white. A
+    # clean scan has clipped-white paper everywhere; only the anti-aliased edges
+    # of the ink are grey, so paper next to the ink is not used as a reference.
+    level, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    near_ink = cv2.dilate(ink, np.ones((3, 3), np.uint8), iterations=2) > 0
+    paper = small[(small > level) & ~near_ink]
+    glare = 0.0
+    if paper.size and np.percentile(paper, 10) < SATURATED:
+        glare = float((paper >= SATURATED).mean())
+    return QualityReport(
+        sharpness=float(cv2.Laplacian(small, cv2.CV_64F).var()),
+        contrast=float(high - low),
+        resolution=int(max(image.shape[:2])),
+        glare=glare
+    )
+
+
+class QualityGate:
+    """Rejects images whose quality scores fall outside the configured thresholds"""
+
+    def __init__(
+        self,
+        min_sharpness: Optional[float] = None,
+        min_contrast: Optional[float] = None,
+        min_resolution: Optional[int] = None,
+        max_glare: Optional[float] = None,
+        max_side: int = 640
+    ):
+        self.min_sharpness = min_sharpness
+        self.min_contrast = min_contrast
+        self.min_resolution = min_resolution
+        self.max_glare = max_glare
+        self.max_side = max_side
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["QualityGate"]:
+        """Build from `ocr.quality`, or None when the gate is off"""
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            min_sharpness=config.get("min_sharpness"),
+            min_contrast=config.get("min_contrast"),
+            min_resolution=config.get("min_resolution"),
+            max_glare=config.get("max_glare"),
+            max_side=config.get("max_side", 640)
+        )
+
+    def thresholds(self) -> Dict[str, float]:
+        limits = {
+            "sharpness": self.min_sharpness,
+            "contrast": self.min_contrast,
+            "resolution": self.min_resolution,
+            "glare": self.max_glare
+        }
+        return {name: value for name, value in limits.items() if value is not None}
+
+    def failed_checks(self, report: QualityReport) -> List[str]:
+        failed = []
+        for name, limit in self.thresholds().items():
+            value = getattr(report, name)
+            if (value > limit) if name == "glare" else (value < limit):
+                failed.append(name)
+        return failed
+
+    def check(self, image: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Score the image and record the scores; a rejection for the response when a check fails"""
+        report = assess(image, self.max_side)
+        for name, value in asdict(report).items():
+            QUALITY_SCORES[name].observe(value)
+        failed = self.failed_checks(report)
+        for name in failed:
+            QUALITY_REJECTIONS.inc(check=name)
+        if not failed:
+            return None
+        return {
+            "reason": "image_quality",
+            "failed_checks": failed,
+            "scores": report.to_dict(),
+            "thresholds": self.thresholds()
+        }
+
+    def describe(self) -> str:
+        """Stable summary of the thresholds, for cache keys"""
+        return ",".join(f"{name}={value}" for name, value in sorted(self.thresholds().items()))
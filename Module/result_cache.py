@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .extraction_result import ExtractionResult
+from .metrics import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "idcard_cache_lookups_total",
+    "Result cache lookups by outcome",
+    ("result",)
+)
+
+# Expired rows are deleted from the disk tier once every this many writes
+SWEEP_EVERY = 256
+
+class ResultCache:
+    """LRU cache of extraction results keyed by the image bytes and pipeline settings.
+
+    Entries live in memory with a size and TTL limit. When `disk_path` is set they
+    are also written to a SQLite file so results survive a restart. The disk
+    tier blocks, so callers on an event loop should run `get` and `put` in an
+    executor.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._writes = 0
+
+        self._db = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+            self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["ResultCache"]:
+        """Build the cache from the `cache` section of config.json, or None when disabled"""
+        cache_config = config.get("cache", {})
+        if not cache_config.get("enabled", True):
+            return None
+        return cls(
+            max_entries=cache_config.get("max_entries", 1024),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+            disk_path=cache_config.get("disk_path")
+        )
+
+    @staticmethod
+    def make_key(image_data: bytes, tesseract_config: str, model_version: str, threshold: float) -> str:
+        """Content address for an image processed with the given settings"""
+        digest = hashlib.blake2b(image_data, digest_size=20)
+        digest.update(f"|{tesseract_config}|{model_version}|{threshold}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[ExtractionResult]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(result="hit")
+                    return result
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    result = ExtractionResult.from_dict(json.loads(row[0]))
+                    self._store(key, row[1], result)
+                    self.disk_hits += 1
+                    CACHE_LOOKUPS.inc(result="disk_hit")
+                    return result
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, key: str, result: ExtractionResult):
+        self.put_many([(key, result)])
+
+    def put_many(self, entries: Iterable[Tuple[str, ExtractionResult]]):
+        """Store several results with a single disk commit"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            rows = []
+            for key, result in entries:
+                self._store(key, expires_at, result)
+                rows.append((key, json.dumps(result.to_dict()), expires_at))
+            if self._db is None or not rows:
+                return
+            self._db.executemany("INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)", rows)
+            # Lookups ignore expired rows, so they are only swept occasionally
+            self._writes += len(rows)
+            if self._writes >= SWEEP_EVERY:
+                self._writes = 0
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            self._db.commit()
+
+    def _store(self, key: str, expires_at: float, result: ExtractionResult):
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
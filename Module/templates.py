@@ -0,0 +1,178 @@
+"""
+Fixed-layout card templates.
+
+A template describes where each field of a known card layout is drawn. Cards
+that match a registered template skip full-page layout analysis: every field
+box is cropped and read as a single text line (`--psm 7`) with the field's own
+character whitelist, and the text read is the field value.
+"""
+
+import glob
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .preprocessing import warp_card
+
+Box = Tuple[int, int, int, int]  # left, top, right, bottom
+
+# Ink ratios used to decide whether a card follows a template's layout
+MIN_FIELD_INK = 0.01
+MAX_GAP_INK = 0.02
+MAX_STRAY_INK = 0.003
+ASPECT_TOLERANCE = 0.03
+
+# Same bonus NERProcessor gives entities that match their field's pattern
+PATTERN_BONUS = 0.2
+
+
+@dataclass
+class TemplateField:
+    name: str
+    label: str
+    label_box: Box
+    box: Box
+    whitelist: Optional[str] = None
+    pattern: Optional[str] = None
+
+    def tesseract_config(self, psm: int = 7) -> str:
+        """Config for this field's crop, read as a single text line by default"""
+        config = f"--oem 3 --psm {psm}"
+        if self.whitelist:
+            config += f' -c tessedit_char_whitelist="{self.whitelist}"'
+        return config
+
+    def score(self, text: str, ocr_confidence: float, well_formed: Optional[bool] = None) -> float:
+        """Field confidence: tesseract's word confidence, raised when the value has the expected shape.
+
+        `well_formed` is the shape check of the field's `ner.fields` spec, which
+        takes precedence over the template's own pattern.
+        """
+        if well_formed is None:
+            well_formed = bool(self.pattern and re.fullmatch(self.pattern, text))
+        # Codes such as roll numbers get low word confidences even when read correctly
+        if well_formed:
+            ocr_confidence += PATTERN_BONUS
+        return min(ocr_confidence, 1.0)
+
+
+@dataclass
+class CardTemplate:
+    name: str
+    size: Tuple[int, int]
+    header_box: Box
+    fields: List[TemplateField] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CardTemplate":
+        return cls(
+            name=data["name"],
+            size=tuple(data["size"]),
+            header_box=tuple(data["header_box"]),
+            fields=[
+                TemplateField(
+                    name=item["name"],
+                    label=item.get("label", ""),
+                    label_box=tuple(item["label_box"]),
+                    box=tuple(item["box"]),
+                    whitelist=item.get("whitelist"),
+                    pattern=item.get("pattern")
+                )
+                for item in data["fields"]
+            ]
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CardTemplate":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def align(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Scale a card to the template canvas, or None if its aspect ratio differs"""
+        import cv2
+
+        width, height = self.size
+        h, w = gray.shape[:2]
+        if abs((w / h) / (width / height) - 1) > ASPECT_TOLERANCE:
+            return None
+        if (w, h) == (width, height):
+            return gray
+        interpolation = cv2.INTER_AREA if w > width else cv2.INTER_CUBIC
+        return cv2.resize(gray, (width, height), interpolation=interpolation)
+
+    def matches(self, ink: np.ndarray) -> bool:
+        """Check a binary ink mask of an aligned card against the layout.
+
+        Every label and value box must contain text, the gap between a label
+        and its value must be blank (so a longer label such as "University:"
+        does not match "College:"), and there must be no text outside the boxes.
+        """
+        def ratio(box: Box) -> float:
+            left, top, right, bottom = box
+            region = ink[top:bottom, left:right]
+            return float(region.mean()) if region.size else 0.0
+
+        expected = np.zeros_like(ink, dtype=bool)
+        for box in [self.header_box] + [f.label_box for f in self.fields] + [f.box for f in self.fields]:
+            left, top, right, bottom = box
+            expected[top:bottom, left:right] = True
+
+        if ratio(self.header_box) < MIN_FIELD_INK:
+            return False
+        for item in self.fields:
+            if ratio(item.label_box) < MIN_FIELD_INK or ratio(item.box) < MIN_FIELD_INK:
+                return False
+            gap = (item.label_box[2] + 1, item.box[1], item.box[0], item.box[3])
+            if gap[2] > gap[0] and ratio(gap) > MAX_GAP_INK:
+                return False
+        return float(ink[~expected].mean()) <= MAX_STRAY_INK
+
+
+class TemplateRegistry:
+    """Registered card layouts, tried in registration order"""
+
+    def __init__(self, templates: Optional[List[CardTemplate]] = None):
+        self.templates: List[CardTemplate] = list(templates or [])
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["TemplateRegistry"]:
+        """Load every *.json template from `templates.dir`, or None when template mode is off"""
+        if not config.get("enabled", False):
+            return None
+        registry = cls()
+        directory = config.get("dir", "resource/templates")
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            registry.register(CardTemplate.load(path))
+        return registry
+
+    def register(self, template: CardTemplate):
+        self.templates.append(template)
+
+    def match(self, gray: np.ndarray, corners: Optional[np.ndarray] = None) -> Optional[Tuple[CardTemplate, np.ndarray, np.ndarray]]:
+        """The first template the card follows, with the card aligned to it and its ink mask.
+
+        With `corners` (a card found in a photo), the card is warped straight
+        onto each template's canvas, either way up.
+        """
+        import cv2
+
+        for template in self.templates:
+            if corners is None:
+                candidates = [template.align(gray)]
+            else:
+                warped = warp_card(gray, corners, template.size)
+                candidates = [warped, np.ascontiguousarray(warped[::-1, ::-1])]
+            for aligned in candidates:
+                if aligned is None:
+                    continue
+                _, ink = cv2.threshold(aligned, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+                ink = ink.astype(bool)
+                if template.matches(ink):
+                    return template, aligned, ink
+        return None
+
+    def describe(self) -> str:
+        """Stable summary of the registered templates, for cache keys"""
+        return ",".join(template.name for template in self.templates)
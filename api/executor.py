@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool cannot admit more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Worker queue is full")
+        self.retry_after = retry_after
+
+
+class Session:
+    """Tasks of one admitted job, at most `max_workers` of them in the executor at once.
+
+    Without the cap a batch admitted as one job could fill the executor queue
+    with hundreds of tasks and make every later job wait behind them.
+    """
+
+    def __init__(self, pool: "WorkerPool"):
+        self._pool = pool
+        self._slots = asyncio.Semaphore(pool.max_workers)
+
+    async def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        async with self._slots:
+            return await self._pool.submit(fn, *args, **kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        """Schedule a task once one of the session's slots is free"""
+        return asyncio.ensure_future(self._run(fn, args, kwargs))
+
+
+class WorkerPool:
+    """Bounded executor that keeps blocking OCR/NER work off the event loop"""
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        max_queue_size: int = 32,
+        retry_after_seconds: int = 2,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = ()
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self.retry_after_seconds = retry_after_seconds
+
+        executor_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        self._executor = executor_cls(
+            max_workers=self.max_workers,
+            initializer=initializer,
+            initargs=initargs
+        )
+
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._tasks = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "WorkerPool":
+        """Build a pool from the `api.executor` section of config.json"""
+        executor_config = config.get("api", {}).get("executor", {})
+        return cls(
+            kind=executor_config.get("kind", "thread"),
+            max_workers=executor_config.get("max_workers"),
+            max_queue_size=executor_config.get("max_queue_size", 32),
+            retry_after_seconds=executor_config.get("retry_after_seconds", 2),
+            **kwargs
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Number of jobs that may be running or waiting at once"""
+        return self.max_workers + self.max_queue_size
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted tasks waiting for a free worker"""
+        with self._lock:
+            return max(0, self._tasks - self.max_workers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "in_flight": self._admitted,
+                "queue_depth": max(0, self._tasks - self.max_workers),
+                "rejected": self._rejected
+            }
+
+    def _admit(self):
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                raise QueueFullError(self.retry_after_seconds)
+            self._admitted += 1
+
+    def _release(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def _task_done(self, _future):
+        with self._lock:
+            self._tasks -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        """Schedule a task inside an admitted session"""
+        with self._lock:
+            self._tasks += 1
+        future = self._executor.submit(partial(fn, *args, **kwargs))
+        future.add_done_callback(self._task_done)
+        return asyncio.wrap_future(future)
+
+    @asynccontextmanager
+    async def session(self):
+        """Admit one job that may submit several tasks, e.g. a batch"""
+        self._admit()
+        try:
+            yield Session(self)
+        finally:
+            self._release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run one job on the pool, raising QueueFullError if it is saturated"""
+        async with self.session():
+            return await self.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
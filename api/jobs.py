@@ -0,0 +1,226 @@
+"""
+Persistent asynchronous job queue for large submissions.
+
+Jobs and their items are stored in SQLite so a restarted API picks up
+unfinished work where it stopped.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from loguru import logger
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+# (index, filename, image bytes or server-side path)
+JobItem = Tuple[int, str, Union[bytes, str]]
+BatchProcessor = Callable[[List[JobItem], float], Awaitable[List[Dict[str, Any]]]]
+
+
+class JobStore:
+    """SQLite tables holding jobs, their input images and per-item results"""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    threshold REAL NOT NULL,
+                    total INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    path TEXT,
+                    data BLOB,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    result TEXT,
+                    seq INTEGER,
+                    PRIMARY KEY (job_id, idx)
+                );
+                CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, job_id, idx);
+            """)
+            self._db.commit()
+
+    def create_job(self, items: List[Tuple[str, Union[bytes, str]]], threshold: float) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, threshold, total, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, threshold, len(items), time.time())
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, idx, filename, path, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, index, name, source if isinstance(source, str) else None,
+                     None if isinstance(source, str) else bytes(source))
+                    for index, (name, source) in enumerate(items)
+                ]
+            )
+            self._db.commit()
+        return job_id
+
+    def next_pending(self, limit: int) -> Optional[Tuple[str, float, List[JobItem]]]:
+        """Oldest unfinished job with up to `limit` of its pending items"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, threshold FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, threshold = row
+            rows = self._db.execute(
+                "SELECT idx, filename, path, data FROM job_items WHERE job_id = ? AND status = 'pending' ORDER BY idx LIMIT ?",
+                (job_id, limit)
+            ).fetchall()
+            if not rows:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'completed', finished_at = ? WHERE id = ?", (time.time(), job_id)
+                )
+                self._db.commit()
+                return job_id, threshold, []
+            self._db.execute("UPDATE jobs SET status = 'running' WHERE id = ? AND status = 'queued'", (job_id,))
+            self._db.commit()
+        return job_id, threshold, [(idx, filename, path if path is not None else data) for idx, filename, path, data in rows]
+
+    def save_results(self, job_id: str, results: List[Dict[str, Any]]):
+        with self._lock:
+            seq = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM job_items WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            for result in results:
+                seq += 1
+                self._db.execute(
+                    "UPDATE job_items SET status = ?, result = ?, seq = ?, data = NULL WHERE job_id = ? AND idx = ?",
+                    ("error" if result.get("status") == "error" else "done", json.dumps(result), seq, job_id, result["index"])
+                )
+            self._db.commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, threshold, total, created_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        total = row[3]
+        completed = counts.get("done", 0)
+        failed = counts.get("error", 0)
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "threshold": row[2],
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "pending": counts.get("pending", 0),
+            "progress": (completed + failed) / total if total else 1.0,
+            "created_at": row[4],
+            "finished_at": row[5]
+        }
+
+    def results_after(self, job_id: str, seq: int) -> Iterator[Tuple[int, str]]:
+        """Finished item results in completion order, after sequence number `seq`"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, result FROM job_items WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, seq)
+            ).fetchall()
+        return iter(rows)
+
+
+class JobRunner:
+    """Background task that drains pending job items through the batch pipeline"""
+
+    def __init__(self, store: JobStore, process_batch: BatchProcessor, chunk_size: int = 16, poll_interval: float = 0.5):
+        self.store = store
+        self.process_batch = process_batch
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self):
+        """Wake the runner after a new job was queued"""
+        self._wakeup.set()
+
+    async def _run(self):
+        # SQLite reads and writes, image BLOBs included, run off the event loop
+        loop = asyncio.get_event_loop()
+        while True:
+            self._wakeup.clear()
+            try:
+                work = await loop.run_in_executor(None, self.store.next_pending, self.chunk_size)
+            except Exception as e:
+                logger.error(f"Failed to read pending jobs: {str(e)}")
+                work = None
+
+            if work is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval * 10)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, threshold, items = work
+            if not items:
+                logger.info(f"Job {job_id} completed")
+                continue
+
+            try:
+                results = await self.process_batch(items, threshold)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Usually the worker pool is saturated; leave the items pending and retry
+                logger.warning(f"Job {job_id} chunk deferred: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await loop.run_in_executor(None, self.store.save_results, job_id, results)
+
+    async def stream_results(self, job_id: str):
+        """Yield finished records as NDJSON lines until the job completes"""
+        loop = asyncio.get_event_loop()
+        seq = 0
+        while True:
+            job = await loop.run_in_executor(None, self.store.get_job, job_id)
+            for seq, result in await loop.run_in_executor(None, self.store.results_after, job_id, seq):
+                yield result + "\n"
+            # Status is read first, so a completed job has had all its results emitted
+            if job is None or job["status"] == "completed":
+                return
+            await asyncio.sleep(self.poll_interval)
+
+
+def list_directory_images(directory: str) -> List[Tuple[str, str]]:
+    """(filename, path) pairs for every image file in a server-side directory"""
+    return [
+        (name, os.path.join(directory, name))
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
@@ -1,23 +1,33 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+
+# Recorded first so the startup log can report how long module imports took
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Query, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Dict, Optional, List
-import base64
+import asyncio
+import hmac
 import json
 import os
+from functools import partial
 from loguru import logger
-from datetime import datetime
 import sys
-import cv2
-import numpy as np
-import pytesseract
-from PIL import Image
-import io
 
 # Import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from Module.ocr_processor import OCRProcessor
-from Module.ner_processor import NERProcessor
+from Module.image_loader import ImageTooLargeError, InvalidImageError
+from Module.extraction_result import ExtractionResult, REQUIRED_FIELDS
+from Module.result_cache import ResultCache
+from Module.model_registry import ModelRegistry
+from Module.metrics import REGISTRY as METRICS, stage
+from Module.concurrency import PROCESSES_ENV, ocr_processes
+from api import tasks
+from api.executor import WorkerPool, QueueFullError
+from api.uploads import decode_base64, read_base64_body, read_body, read_upload
+from api.jobs import JobItem, JobRunner, JobStore, list_directory_images
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -49,13 +59,133 @@ logger.add(
     format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
 )
 
-# Initialize processors
-ocr_processor = OCRProcessor()
-ner_processor = NERProcessor(model_path=config.get("ner_model_path", "trained_models/ner"))
+# Blocking OCR/NER work runs on a bounded pool so the event loop stays responsive
+if config.get("api", {}).get("executor", {}).get("kind", "thread") == "process":
+    # Each pool process runs its own OCR, so they split this worker's share of the cores
+    pool_size = config["api"]["executor"].get("max_workers") or os.cpu_count() or 1
+    os.environ[PROCESSES_ENV] = str(ocr_processes() * pool_size)
+    worker_pool = WorkerPool.from_config(config, initializer=tasks.init_worker)
+else:
+    worker_pool = WorkerPool.from_config(config)
+
+# Repeated submissions of the same image are answered from the result cache
+result_cache = ResultCache.from_config(config)
+# Pipeline settings and model version for cache keys, captured by the warm-up so that
+# the event loop never loads the processor; the cache is bypassed until then
+cache_settings: Dict[str, str] = {}
+near_duplicates_enabled = config.get("cache", {}).get("near_duplicate", {}).get("enabled", False)
+
+REQUESTS = METRICS.counter(
+    "idcard_requests_total",
+    "Extraction requests by endpoint and outcome",
+    ("endpoint", "status")
+)
+METRICS.gauge("idcard_queue_depth", "Tasks waiting for a free worker").set_function(lambda: worker_pool.queue_depth)
+METRICS.gauge("idcard_jobs_in_flight", "Jobs admitted to the worker pool").set_function(lambda: worker_pool.stats()["in_flight"])
+
+# Admin-only features such as request profiling
+admin_token = os.getenv("ADMIN_TOKEN") or config.get("api", {}).get("admin_token")
+profile_dir = config.get("api", {}).get("profile_dir", "logs/profiles")
+
+# Retrained models are picked up by /admin/model/reload or by polling the model directory
+model_path = config.get("ner", {}).get("model_path", "trained_models/ner")
+model_watch_interval = config.get("ner", {}).get("watch_interval_seconds", 0)
+
+max_image_bytes = int(config.get("storage", {}).get("max_file_size_mb", 10) * 1024 * 1024)
+max_batch_size = config.get("api", {}).get("max_batch_size", 256)
+
+# Flipped by the startup warm-up; /ready reports it
+readiness = {"status": "starting", "startup": {}}
+import_seconds = time.perf_counter() - _import_started
+
+async def _warm_up():
+    """Load the model and run a synthetic card through the pipeline before serving"""
+    started = time.perf_counter()
+    try:
+        timings = await worker_pool.run(tasks.warm_up)
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+        readiness.update(status="failed", error=str(e))
+        return
+    if result_cache is not None:
+        cache_settings.update(await worker_pool.run(tasks.cache_settings))
+
+    timings = {"module_import": import_seconds, **timings, "warm_up_total": time.perf_counter() - started}
+    readiness.update(status="ready", startup=timings)
+    logger.info("Startup complete: " + ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.items()))
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Runs in the background so /health answers while the model is loading
+    asyncio.ensure_future(_warm_up())
+
+async def _reload_model(source_path: Optional[str] = None) -> Dict:
+    """Load and validate a new model off the event loop and outside the OCR worker slots"""
+    loop = asyncio.get_event_loop()
+    info = await loop.run_in_executor(None, tasks.reload_model, source_path)
+    if cache_settings:
+        cache_settings["model_version"] = info["version"]
+    logger.info(f"Reloaded NER model {info['version']} from {info['source_path']} in {info['load_seconds']:.2f}s")
+    return info
+
+async def _watch_model(interval: float):
+    """Reload the model once its files have changed and then stayed unchanged for one poll"""
+    loop = asyncio.get_event_loop()
+    changed = None
+    failed = None
+    while True:
+        await asyncio.sleep(interval)
+        info = ModelRegistry.default().info(model_path)
+        if info is None:
+            continue
+        try:
+            fingerprint = await loop.run_in_executor(None, ModelRegistry.fingerprint, info["source_path"])
+        except OSError:
+            # Files vanished mid-walk, most likely a retrain in progress
+            continue
+        if info["version"].endswith("+" + fingerprint) or fingerprint == failed:
+            changed = None
+            continue
+        if fingerprint != changed:
+            changed = fingerprint
+            continue
+        try:
+            await _reload_model()
+        except Exception as e:
+            failed = fingerprint
+            logger.error(f"Model reload failed, keeping the current model: {str(e)}")
+
+@app.on_event("startup")
+async def start_model_watcher():
+    # Process pool workers hold their own copies, which a reload here would not reach
+    if model_watch_interval and worker_pool.kind == "thread":
+        asyncio.ensure_future(_watch_model(model_watch_interval))
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    logger.warning(f"Rejecting request to {request.url.path}: worker queue is full")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.on_event("shutdown")
+def shutdown_worker_pool():
+    worker_pool.shutdown(wait=False)
 
 class ImageRequest(BaseModel):
     image: str  # base64 encoded image
-    threshold: Optional[float] = 0.7
+    threshold: Optional[float] = Field(0.7, ge=0.0, le=1.0)
+
+class BatchImageRequest(BaseModel):
+    images: List[str]  # base64 encoded images
+    threshold: Optional[float] = Field(0.7, ge=0.0, le=1.0)
+
+class JobRequest(BaseModel):
+    images: Optional[List[str]] = None  # base64 encoded images
+    directory: Optional[str] = None  # server-side directory of images
+    threshold: Optional[float] = Field(0.7, ge=0.0, le=1.0)
 
 class IDCardResponse(BaseModel):
     user_id: str
@@ -69,146 +199,409 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 only after the startup warm-up has completed"""
+    if readiness["status"] != "ready":
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+@app.get("/metrics")
+async def metrics():
+    """Pipeline metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+async def stats():
+    """Worker pool, OCR slot and result cache utilisation"""
+    return {
+        "queue": worker_pool.stats(),
+        "ocr": tasks.ocr_stats(),
+        "cache": result_cache.stats() if result_cache else None,
+        "near_duplicates": tasks.near_duplicate_stats()
+    }
+
 @app.get("/version")
 async def version():
     """Get API version information"""
+    info = ModelRegistry.default().info(model_path)
     return {
-        "model_version": "1.0.0",
-        "config_version": "1.0.0"
+        "model_version": info["version"] if info else None,
+        "model_path": info["source_path"] if info else model_path,
+        "model_loaded_at": info["loaded_at"] if info else None,
+        "model_load_seconds": info["load_seconds"] if info else None,
+        "config_version": config.get("api", {}).get("version", "1.0.0")
     }
 
-@app.post("/extract")
-async def extract_info(request: ImageRequest):
-    """Extract information from ID card image"""
-    try:
-        # Decode base64 image
-        try:
-            image_data = base64.b64decode(request.image)
-        except Exception as e:
-            logger.error(f"Failed to decode base64 image: {str(e)}")
-            raise HTTPException(status_code=400, detail="Invalid base64 image")
+def _cache_key(image_data: bytes, threshold: float) -> Optional[str]:
+    """Result cache key for an image, or None while the cache is off or warm-up has not finished"""
+    if result_cache is None or not cache_settings:
+        return None
+    return ResultCache.make_key(image_data, cache_settings["settings"], cache_settings["model_version"], threshold)
 
-        # Save temporary image
-        temp_path = f"temp/temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        os.makedirs("temp", exist_ok=True)
-        with open(temp_path, "wb") as f:
-            f.write(image_data)
+async def _extract(image_data: bytes, threshold: float) -> ExtractionResult:
+    """Run the pipeline on the worker pool unless the result is already cached"""
+    loop = asyncio.get_event_loop()
+    # Hashing a large image and the SQLite tier both block, so they run off the event loop
+    key = await loop.run_in_executor(None, _cache_key, image_data, threshold)
+    if key is None:
+        return await worker_pool.run(tasks.extract, image_data, threshold)
 
-        try:
-            # Process with OCR
-            logger.info("Starting OCR processing")
-            ocr_result = ocr_processor.process_id_card(temp_path)
-            
-            # Process with NER
-            logger.info("Starting NER processing")
-            ner_result = ner_processor.process_text(ocr_result["raw_text"])
-            
-            # Combine results
-            combined_result = {
-                "extracted_fields": {},
-                "confidence_scores": {},
-                "raw_text": ocr_result["raw_text"],
-                "overall_confidence": 0.0
-            }
+    result = await loop.run_in_executor(None, result_cache.get, key)
+    if result is None:
+        result = await worker_pool.run(tasks.extract, image_data, threshold)
+        await loop.run_in_executor(None, result_cache.put, key, result)
+    return result
 
-            # Required fields to check
-            required_fields = ["name", "college", "roll_number", "branch", "valid_upto"]
-            
-            # Map fields and calculate confidence
-            field_confidences = []
-            for field, value in ner_result.items():
-                if value["confidence"] >= request.threshold:
-                    combined_result["extracted_fields"][field] = value["text"]
-                    combined_result["confidence_scores"][field] = value["confidence"]
-                    field_confidences.append(value["confidence"])
-
-            # Calculate overall confidence
-            if field_confidences:
-                combined_result["overall_confidence"] = sum(field_confidences) / len(field_confidences)
-
-            # Add missing fields
-            combined_result["missing_fields"] = [field for field in required_fields if field not in combined_result["extracted_fields"]]
-            
-            # Determine status
-            if not combined_result["missing_fields"]:
-                combined_result["status"] = "success"
-            elif combined_result["extracted_fields"]:
-                combined_result["status"] = "partial_success"
-            else:
-                combined_result["status"] = "failure"
+def _is_admin(x_admin_token: Optional[str]) -> bool:
+    return bool(admin_token and x_admin_token and hmac.compare_digest(x_admin_token, admin_token))
+
+def profile_options(
+    profile: bool = Query(False),
+    trace_memory: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None)
+) -> Optional[Dict]:
+    """Admin-gated `profile=true` query flag shared by the extract endpoints"""
+    if not profile:
+        return None
+    if not _is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Admin-Token header")
+    return {"trace_memory": trace_memory}
+
+class ModelReloadRequest(BaseModel):
+    source_path: Optional[str] = None  # defaults to reloading the current model directory
 
-            logger.info(f"Processing completed with overall confidence: {combined_result['overall_confidence']}")
-            return combined_result
+@app.post("/admin/model/reload")
+async def reload_model(request: Optional[ModelReloadRequest] = None, x_admin_token: Optional[str] = Header(None)):
+    """Load a retrained NER model and swap it in without a restart.
+
+    The new model is validated on a smoke card first; if it fails the current
+    model keeps serving. Requests already running finish on the old model.
+    """
+    if not _is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Model reload requires a valid X-Admin-Token header")
+    if worker_pool.kind != "thread":
+        raise HTTPException(status_code=409, detail="Model reload is only supported with the thread executor")
+    if os.getenv("API_WORKER_ID") is not None:
+        # A pre-forked worker would only swap its own copy while its siblings keep the old model
+        raise HTTPException(
+            status_code=409,
+            detail="Model reload is not supported under --prefork; set ner.watch_interval_seconds so every worker reloads"
+        )
+    try:
+        info = await _reload_model(request.source_path if request else None)
+    except Exception as e:
+        logger.error(f"Model reload failed, keeping the current model: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Model reload failed: {str(e)}")
+    return {"status": "reloaded", "model": info}
+
+async def _extract_response(image_data: bytearray, threshold: float, endpoint: str, profiling: Optional[Dict] = None) -> Dict:
+    """Run one decoded image through the pipeline and shape the API response"""
+    try:
+        # Process with OCR and NER on the worker pool, straight from the request buffer
+        logger.info("Starting OCR/NER processing")
+        report = None
+        try:
+            if profiling is not None:
+                # Profiled runs bypass the cache so the whole pipeline is measured
+                result, report = await worker_pool.run(
+                    tasks.extract_profiled, image_data, profile_dir, profiling["trace_memory"], threshold
+                )
+            else:
+                result = await _extract(image_data, threshold)
+        except ImageTooLargeError as e:
+            logger.error(str(e))
+            raise HTTPException(status_code=413, detail=str(e))
+        except InvalidImageError as e:
+            logger.error(str(e))
+            raise HTTPException(status_code=400, detail="Invalid image")
+        combined_result = result.to_response(threshold)
+        if report is not None:
+            logger.info(f"Profiled request written to {report['pstats_path']}")
+            combined_result["profile"] = report
+        REQUESTS.inc(endpoint=endpoint, status=combined_result["status"])
 
-        finally:
-            # Cleanup temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        logger.info(f"Processing completed with overall confidence: {combined_result['overall_confidence']}")
+        return combined_result
 
+    except (HTTPException, QueueFullError):
+        REQUESTS.inc(endpoint=endpoint, status="error")
+        raise
     except Exception as e:
+        REQUESTS.inc(endpoint=endpoint, status="error")
         logger.error(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/extract")
+async def extract_info(request: ImageRequest, profiling: Optional[Dict] = Depends(profile_options)):
+    """Extract information from ID card image"""
+    with stage("base64_decode"):
+        image_data = decode_base64(request.image, max_image_bytes)
+    return await _extract_response(image_data, request.threshold, "/extract", profiling)
+
 @app.post("/extract/file")
-async def extract_info_from_file(file: UploadFile = File(...), threshold: float = 0.7):
+async def extract_info_from_file(
+    file: UploadFile = File(...),
+    threshold: float = Query(0.7, ge=0.0, le=1.0),
+    profiling: Optional[Dict] = Depends(profile_options)
+):
+    content = await read_upload(file, max_image_bytes)
+    return await _extract_response(content, threshold, "/extract/file", profiling)
+
+@app.post("/extract/raw")
+async def extract_info_from_body(
+    request: Request,
+    threshold: float = Query(0.7, ge=0.0, le=1.0),
+    encoding: Optional[str] = None,
+    profiling: Optional[Dict] = Depends(profile_options)
+):
+    """Extract information from an image sent as the raw request body.
+
+    Send the image bytes with Content-Type `application/octet-stream` or
+    `image/*`. With `?encoding=base64` (or Content-Type `text/plain`) the body
+    is base64 text that is decoded as it streams in. Bodies larger than
+    `storage.max_file_size_mb` are rejected with 413 before being buffered.
+    """
+    content_type = request.headers.get("content-type", "application/octet-stream").split(";")[0].strip().lower()
+    if encoding == "base64" or content_type == "text/plain":
+        image_data = await read_base64_body(request, max_image_bytes)
+    elif content_type == "application/octet-stream" or content_type.startswith("image/"):
+        image_data = await read_body(request, max_image_bytes)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+    return await _extract_response(image_data, threshold, "/extract/raw", profiling)
+
+async def _read_batch(request: Request):
+    """Collect (filename, bytes) pairs from a multipart upload or a JSON body.
+
+    Images that cannot be read are paired with the HTTPException describing why,
+    so the batch can report them per item.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        # Validated like the JSON body's threshold field
+        try:
+            threshold = float(form.get("threshold", request.query_params.get("threshold", 0.7)))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="threshold must be a number")
+        if not 0.0 <= threshold <= 1.0:
+            raise HTTPException(status_code=422, detail="threshold must be between 0 and 1")
+        items = []
+        for upload in form.getlist("files"):
+            try:
+                items.append((upload.filename, await read_upload(upload, max_image_bytes)))
+            except HTTPException as e:
+                items.append((upload.filename, e))
+        return items, threshold
+
     try:
-        # Save temporary file
-        temp_path = f"temp/temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        os.makedirs("temp", exist_ok=True)
-        
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        body = BatchImageRequest(**await request.json())
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch request: {str(e)}")
 
+    items = []
+    for index, image in enumerate(body.images):
         try:
-            # Process with OCR
-            logger.info("Starting OCR processing")
-            ocr_result = ocr_processor.process_id_card(temp_path)
-            
-            # Process with NER
-            logger.info("Starting NER processing")
-            ner_result = ner_processor.process_text(ocr_result["raw_text"])
-            
-            # Combine results (same as in /extract endpoint)
-            combined_result = {
-                "extracted_fields": {},
-                "confidence_scores": {},
-                "raw_text": ocr_result["raw_text"],
-                "overall_confidence": 0.0
+            items.append((f"image_{index}", decode_base64(image, max_image_bytes)))
+        except HTTPException as e:
+            items.append((f"image_{index}", e))
+    return items, body.threshold
+
+@app.post("/extract/batch")
+async def extract_batch(request: Request):
+    """Extract information from many ID card images in one request.
+
+    Accepts either multipart form data with repeated `files` fields or a JSON
+    body of the form {"images": [base64, ...], "threshold": 0.7}. OCR is fanned
+    out across the worker pool and all texts go through NER in one batch.
+    Results are returned in input order with per-item errors.
+    """
+    items, threshold = await _read_batch(request)
+    if not items:
+        raise HTTPException(status_code=400, detail="No images supplied")
+    if len(items) > max_batch_size:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {max_batch_size} images")
+
+    logger.info(f"Starting batch OCR/NER processing of {len(items)} images")
+    results = await _process_batch([(index, name, data) for index, (name, data) in enumerate(items)], threshold)
+    logger.info(f"Batch processing completed for {len(items)} images")
+    return {"results": results}
+
+async def _process_batch(items: List[JobItem], threshold: float, endpoint: str = "/extract/batch") -> List[Dict]:
+    """Fan OCR out across the worker pool, then run NER over all texts at once.
+
+    Items are (index, filename, source) where source is image bytes, a
+    server-side path, or the HTTPException raised while reading it.
+    """
+    results = [None] * len(items)
+    loop = asyncio.get_event_loop()
+    async with worker_pool.session() as session:
+        pending = {}
+        cache_keys = {}
+        for position, (index, name, data) in enumerate(items):
+            if isinstance(data, HTTPException):
+                results[position] = {"index": index, "filename": name, "status": "error", "error": data.detail}
+                continue
+
+            key = await loop.run_in_executor(None, _cache_key, data, threshold) if not isinstance(data, str) else None
+            if key is not None:
+                cache_keys[position] = key
+                cached = await loop.run_in_executor(None, result_cache.get, key)
+                if cached is not None:
+                    results[position] = {"index": index, "filename": name, **cached.to_response(threshold)}
+                    continue
+
+            pending[position] = session.submit(tasks.read_card, data, threshold)
+
+        texts = await asyncio.gather(*pending.values(), return_exceptions=True)
+
+        ocr_texts = {}
+        extracted = {}
+        for position, text in zip(pending.keys(), texts):
+            index, name, _ = items[position]
+            if isinstance(text, Exception):
+                invalid = isinstance(text, InvalidImageError) and not isinstance(text, ImageTooLargeError)
+                error = "Invalid image" if invalid else str(text)
+                logger.error(f"Batch item {index} failed: {str(text)}")
+                results[position] = {"index": index, "filename": name, "status": "error", "error": error}
+            elif isinstance(text, ExtractionResult):
+                # Read through a card template, refused by the quality gate or a near duplicate; no NER needed
+                extracted[position] = text
+            else:
+                ocr_texts[position] = text
+
+        if ocr_texts:
+            ner_results = await session.submit(tasks.extract_texts, list(ocr_texts.values()))
+            extracted.update(zip(ocr_texts.keys(), ner_results))
+
+        # Only cards missing required fields after the first OCR pass go through the heavier passes
+        escalating = {
+            position: session.submit(tasks.escalate, items[position][2], result, threshold)
+            for position, result in extracted.items()
+            if result.rejection is None and not result.near_duplicate and result.missing_fields(threshold)
+        }
+        if escalating:
+            retried = await asyncio.gather(*escalating.values(), return_exceptions=True)
+            for position, result in zip(escalating.keys(), retried):
+                if isinstance(result, Exception):
+                    logger.error(f"Batch item {items[position][0]} escalation failed: {str(result)}")
+                else:
+                    extracted[position] = result
+
+        # Index the cards read in this batch so that later copies of them skip OCR
+        if near_duplicates_enabled:
+            indexing = [
+                session.submit(tasks.remember, items[position][2], result, threshold)
+                for position, result in extracted.items()
+                if result.rejection is None and not result.near_duplicate
+            ]
+            for error in await asyncio.gather(*indexing, return_exceptions=True):
+                if isinstance(error, Exception):
+                    logger.error(f"Near-duplicate indexing failed: {str(error)}")
+
+        fresh = [(cache_keys[position], result) for position, result in extracted.items() if position in cache_keys]
+        if fresh:
+            await loop.run_in_executor(None, result_cache.put_many, fresh)
+        for position, result in extracted.items():
+            index, name, _ = items[position]
+            results[position] = {
+                "index": index,
+                "filename": name,
+                **result.to_response(threshold)
             }
 
-            # Map fields and calculate confidence
-            field_confidences = []
-            for field, value in ner_result.items():
-                if value["confidence"] >= threshold:
-                    combined_result["extracted_fields"][field] = value["text"]
-                    combined_result["confidence_scores"][field] = value["confidence"]
-                    field_confidences.append(value["confidence"])
+    for result in results:
+        REQUESTS.inc(endpoint=endpoint, status=result["status"])
+    return results
 
-            # Calculate overall confidence
-            if field_confidences:
-                combined_result["overall_confidence"] = sum(field_confidences) / len(field_confidences)
+# Large submissions are queued in SQLite and drained in the background
+jobs_config = config.get("jobs", {})
+job_store = JobStore(jobs_config.get("db_path", "jobs/jobs.sqlite"))
+job_runner = JobRunner(
+    job_store,
+    partial(_process_batch, endpoint="/jobs"),
+    chunk_size=jobs_config.get("chunk_size", 16),
+    poll_interval=jobs_config.get("poll_interval_seconds", 0.5)
+)
 
-            logger.info(f"Processing completed with overall confidence: {combined_result['overall_confidence']}")
-            return combined_result
+@app.on_event("startup")
+async def start_job_runner():
+    # Under the pre-fork server every worker can queue jobs but only the first drains them
+    if os.getenv("API_WORKER_ID", "0") == "0":
+        job_runner.start()
 
-        finally:
-            # Cleanup temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+@app.on_event("shutdown")
+async def stop_job_runner():
+    await job_runner.stop()
 
-    except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.post("/jobs", status_code=202)
+async def create_job(request: Request):
+    """Queue a large submission for background processing.
+
+    Accepts the same multipart or JSON image payloads as /extract/batch, or JSON
+    of the form {"directory": "output_images", "threshold": 0.7} naming a
+    server-side directory under one of `jobs.allowed_dirs`.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        items, threshold = await _read_batch(request)
+    else:
+        try:
+            body = JobRequest(**await request.json())
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Invalid job request: {str(e)}")
+        threshold = body.threshold
+
+        if body.directory is not None:
+            directory = os.path.realpath(body.directory)
+            allowed = [os.path.realpath(path) for path in jobs_config.get("allowed_dirs", [])]
+            if not any(directory == root or directory.startswith(root + os.sep) for root in allowed):
+                raise HTTPException(status_code=403, detail="Directory is not allowed")
+            if not os.path.isdir(directory):
+                raise HTTPException(status_code=404, detail="Directory not found")
+            items = list_directory_images(directory)
+        else:
+            items = []
+            for image in body.images or []:
+                items.append((f"image_{len(items)}", decode_base64(image, max_image_bytes)))
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No images supplied")
+    for _, data in items:
+        if isinstance(data, HTTPException):
+            raise data
+
+    # Inserting every image of a large submission must not stall other requests
+    loop = asyncio.get_event_loop()
+    job_id = await loop.run_in_executor(None, job_store.create_job, items, threshold)
+    job_runner.notify()
+    logger.info(f"Queued job {job_id} with {len(items)} images")
+    return await loop.run_in_executor(None, job_store.get_job, job_id)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report the progress of a queued job"""
+    job = await asyncio.get_event_loop().run_in_executor(None, job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """Stream finished records as NDJSON while the job is still running"""
+    if await asyncio.get_event_loop().run_in_executor(None, job_store.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(job_runner.stream_results(job_id), media_type="application/x-ndjson")
 
 def process_id_card(image_data):
+    # Only this legacy endpoint needs OpenCV, so it is imported on first use
+    import cv2
+    import pytesseract
+
     try:
-        # Convert image data to numpy array
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Checked against the size limits, then decoded straight to grayscale at the working width
+        gray = tasks.get_processor().loader.load(image_data)
         
         # Apply thresholding to preprocess the image
         threshold = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
@@ -271,6 +664,9 @@ def process_id_card(image_data):
                 result["id_card"]["extracted_fields"]["valid_upto"] = line.split(":", 1)[-1].strip()
         
         return result
+    except ImageTooLargeError:
+        # Refused like on /extract rather than reported as a card with no fields
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -278,20 +674,20 @@ def process_id_card(image_data):
 async def process_id_card_endpoint(file: UploadFile = File(...)):
     try:
         # Read the uploaded file
-        contents = await file.read()
+        contents = await read_upload(file, max_image_bytes)
         
         # Process the image
-        result = process_id_card(contents)
+        result = await worker_pool.run(process_id_card, contents)
         
         # Transform the result into the desired format
         extracted_fields = result.get("id_card", {}).get("extracted_fields", {})
         
         # Calculate missing fields
-        required_fields = ["name", "college", "roll_number", "branch", "valid_upto"]
-        missing_fields = [field for field in required_fields if field not in extracted_fields]
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in extracted_fields]
         
         # Determine status
         status = "success" if not missing_fields else "partial_success" if extracted_fields else "failure"
+        REQUESTS.inc(endpoint="/process-id-card", status=status)
         
         # Calculate confidence score (you can adjust this based on your needs)
         confidence_score = 0.91 if status == "success" else 0.85 if status == "partial_success" else 0.0
@@ -305,6 +701,11 @@ async def process_id_card_endpoint(file: UploadFile = File(...)):
         }
         
         return response
+    except (HTTPException, QueueFullError):
+        raise
+    except ImageTooLargeError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,149 @@
+"""
+Pre-fork multi-process server for production use.
+
+The parent process loads the configuration and the spaCy model once, freezes
+the garbage collector so those objects are never written to again, binds the
+listening socket and forks the workers. Each worker serves the app with
+uvicorn on the shared socket and reads the model from pages it shares with the
+parent copy-on-write. A worker exits gracefully after a configurable number of
+requests and the parent forks a fresh one in its place.
+"""
+
+import gc
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Dict, Optional, Tuple
+
+import uvicorn
+from loguru import logger
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api import tasks
+from Module.concurrency import PROCESSES_ENV
+
+# Workers that exit sooner than this after being forked are respawned with a delay
+MIN_WORKER_UPTIME = 1.0
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        app: str = "api.main:app",
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        max_requests: Optional[int] = None,
+        max_requests_jitter: int = 0,
+        config_path: str = "config.json"
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.config_path = config_path
+        self._children: Dict[int, Tuple[int, float]] = {}
+        self._stopping = False
+
+    @classmethod
+    def from_config(cls, config_path: str = "config.json", **overrides) -> "PreforkServer":
+        """Build the server from the `api` section of config.json"""
+        with open(config_path, "r") as f:
+            api_config = json.load(f).get("api", {})
+        settings: Dict[str, Any] = {
+            "host": api_config.get("host", "0.0.0.0"),
+            "port": api_config.get("port", 8000),
+            "workers": api_config.get("workers"),
+            "max_requests": api_config.get("max_requests_per_worker"),
+            "max_requests_jitter": api_config.get("max_requests_jitter", 0)
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(config_path=config_path, **settings)
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, sock: socket.socket, worker_id: int):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = (worker_id, time.monotonic())
+            return
+
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self._run_worker(sock, worker_id)
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self, sock: socket.socket, worker_id: int):
+        # Lets the app run singleton background work (the job runner) in one worker only
+        os.environ["API_WORKER_ID"] = str(worker_id)
+
+        limit = None
+        if self.max_requests:
+            # Jitter staggers the recycling so workers do not all restart together
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        config = uvicorn.Config(self.app, limit_max_requests=limit)
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _handle_exit(self, signum, frame):
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self):
+        # Workers split the cores between their OCR calls
+        os.environ[PROCESSES_ENV] = str(self.workers)
+
+        # Load the model before forking so every worker shares the parent's copy
+        start = time.perf_counter()
+        tasks.get_processor(self.config_path)
+        # Moving everything to the permanent generation keeps gc from touching (and copying) shared pages
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Loaded processor in {time.perf_counter() - start:.2f}s, forking {self.workers} workers")
+
+        sock = self._bind()
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        for worker_id in range(self.workers):
+            self._spawn(sock, worker_id)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker_id, started = self._children.pop(pid, (None, 0.0))
+            if worker_id is None or self._stopping:
+                continue
+
+            uptime = time.monotonic() - started
+            logger.info(f"Worker {worker_id} (pid {pid}) exited after {uptime:.1f}s with status {status}, respawning")
+            if uptime < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            if not self._stopping:
+                self._spawn(sock, worker_id)
+
+        sock.close()
+        logger.info("All workers stopped")
@@ -0,0 +1,136 @@
+"""
+Blocking OCR/NER jobs executed on the API worker pool.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Module.ocr_processor import OCRProcessor, ImageSource
+from Module.ocr_backends import OCRResult
+from Module.extraction_result import ExtractionResult
+from Module.profiling import RequestProfiler
+
+# Fields drawn on the synthetic card used to warm up the pipeline
+WARMUP_FIELDS = {
+    "name": "Nathan Henry",
+    "college": "JNTU Kakinada",
+    "roll_number": "22JNT5377",
+    "branch": "Computer Science",
+    "valid_upto": "2028"
+}
+
+_ocr_processor = None
+_processor_lock = threading.Lock()
+
+
+def set_processor(ocr_processor: OCRProcessor):
+    """Share an already loaded processor with thread pool workers"""
+    global _ocr_processor
+    _ocr_processor = ocr_processor
+
+
+def get_processor(config_path: str = "config.json") -> OCRProcessor:
+    """Return the shared processor, loading it (and the NER model) on first use"""
+    global _ocr_processor
+    if _ocr_processor is None:
+        with _processor_lock:
+            if _ocr_processor is None:
+                _ocr_processor = OCRProcessor(config_path)
+    return _ocr_processor
+
+
+def ocr_stats() -> Optional[Dict[str, Any]]:
+    """OCR slot usage of this process, or None before the processor is loaded"""
+    return _ocr_processor.governor.stats() if _ocr_processor is not None else None
+
+
+def near_duplicate_stats() -> Optional[Dict[str, Any]]:
+    """Near-duplicate index usage of this process, or None when it is off or not loaded"""
+    if _ocr_processor is None or _ocr_processor.duplicates is None:
+        return None
+    return _ocr_processor.duplicates.stats()
+
+
+def init_worker(config_path: str = "config.json"):
+    """Load the processor inside a freshly started process pool worker"""
+    set_processor(OCRProcessor(config_path))
+
+
+def warm_up(font_path: str = "resource/DejaVuSans.ttf") -> Dict[str, float]:
+    """Load the processor and push a synthetic card through the full pipeline.
+
+    Returns the time spent per startup step so it can be logged.
+    """
+    from Module.id_card import IdCard
+
+    timings = {}
+    start = time.perf_counter()
+    processor = get_processor()
+    timings["processor_init"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    card = IdCard.render_card("warmup", WARMUP_FIELDS, font_path)
+    timings["render_card"] = time.perf_counter() - start
+
+    profiler = RequestProfiler()
+    # The synthetic card's fields must never be served for an upload
+    processor.process_id_card(card, profiler, index=False)
+    timings.update(profiler.stages)
+    return timings
+
+
+def cache_settings() -> Dict[str, str]:
+    """Pipeline settings and model version that result cache keys are made from"""
+    processor = get_processor()
+    return {"settings": processor.settings(), "model_version": processor.ner.model_version}
+
+
+def reload_model(source_path: Optional[str] = None) -> Dict[str, Any]:
+    """Load and validate a new NER model version, then swap it in for new requests"""
+    return get_processor().ner.reload(source_path)
+
+
+def extract(image: ImageSource, threshold: Optional[float] = None) -> ExtractionResult:
+    """Run OCR and NER on an image, escalating to heavier OCR passes while required fields fall below `threshold`"""
+    return get_processor().process_id_card(image, threshold=threshold)
+
+
+def extract_profiled(
+    image: ImageSource,
+    profile_dir: str,
+    trace_memory: bool = False,
+    threshold: Optional[float] = None
+) -> Tuple[ExtractionResult, Dict[str, Any]]:
+    """Run the pipeline under cProfile and return the result with a timing report"""
+    profiler = RequestProfiler(trace_memory=trace_memory)
+    result = profiler.run(get_processor().process_id_card, image, profiler, threshold)
+    profiler.dump(profile_dir)
+    return result, profiler.report()
+
+
+def read_card(image: ImageSource, threshold: Optional[float] = None) -> Union[OCRResult, ExtractionResult]:
+    """Run only the OCR stage so a batch can fan it out across workers.
+
+    Cards matching a template, refused by the quality gate or found in the
+    near-duplicate index come back as a finished result; others as OCR words for NER.
+    """
+    return get_processor().read_card(image, threshold=threshold)
+
+
+def extract_texts(texts: List[Union[str, OCRResult]]) -> List[ExtractionResult]:
+    """Run NER over a whole batch of OCR texts in one pass"""
+    return get_processor().process_texts(texts)
+
+
+def escalate(image: ImageSource, result: ExtractionResult, threshold: Optional[float] = None) -> ExtractionResult:
+    """Re-read a card whose first-pass result is missing required fields with the heavier OCR passes"""
+    return get_processor().escalate(image, result, threshold)
+
+
+def remember(image: ImageSource, result: ExtractionResult, threshold: Optional[float] = None):
+    """Index a batch card's finished result for near-duplicate lookups"""
+    get_processor().remember(image, result, threshold)
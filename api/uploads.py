@@ -0,0 +1,110 @@
+"""
+Size-limited readers for image uploads.
+
+Request bodies are consumed in chunks so oversize uploads are rejected before
+they are fully buffered, and base64 payloads are decoded incrementally instead
+of materialising the encoded and decoded copies side by side.
+"""
+
+import base64
+import binascii
+from typing import AsyncIterator, Union
+from fastapi import HTTPException, Request, UploadFile
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+
+
+class Base64Decoder:
+    """Incremental base64 decoder that enforces a limit on the decoded size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.output = bytearray()
+        self._pending = b""
+
+    def feed(self, chunk: Union[bytes, str]):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii", errors="replace")
+        data = self._pending + b"".join(chunk.split())
+
+        # Only whole 4-character quanta can be decoded; keep the rest for the next chunk
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        if not usable:
+            return
+
+        if len(self.output) + usable // 4 * 3 > self.max_bytes + 2:
+            raise _too_large(self.max_bytes)
+        try:
+            self.output += base64.b64decode(data[:usable], validate=True)
+        except binascii.Error:
+            raise HTTPException(status_code=400, detail="Invalid base64 image")
+
+    def finish(self) -> bytearray:
+        if self._pending:
+            raise HTTPException(status_code=400, detail="Invalid base64 image")
+        if len(self.output) > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        return self.output
+
+
+def decode_base64(data: str, max_bytes: int) -> bytearray:
+    """Decode a base64 string in chunks, rejecting oversize images up front"""
+    if len(data) // 4 * 3 > max_bytes + 2:
+        raise _too_large(max_bytes)
+
+    decoder = Base64Decoder(max_bytes)
+    # A multiple of 4 keeps chunk boundaries aligned with base64 quanta
+    step = CHUNK_SIZE * 4
+    for start in range(0, len(data), step):
+        decoder.feed(data[start:start + step])
+    return decoder.finish()
+
+
+def _check_content_length(request: Request, max_bytes: int, expansion: float = 1.0):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes * expansion:
+        raise _too_large(max_bytes)
+
+
+async def _stream(request: Request) -> AsyncIterator[bytes]:
+    async for chunk in request.stream():
+        if chunk:
+            yield chunk
+
+
+async def read_body(request: Request, max_bytes: int) -> bytearray:
+    """Read a raw request body, stopping as soon as it exceeds the limit"""
+    _check_content_length(request, max_bytes)
+    body = bytearray()
+    async for chunk in _stream(request):
+        body += chunk
+        if len(body) > max_bytes:
+            raise _too_large(max_bytes)
+    return body
+
+
+async def read_base64_body(request: Request, max_bytes: int) -> bytearray:
+    """Decode a base64 request body as it streams in"""
+    # Encoded payloads are 4/3 the size of the image plus optional line breaks
+    _check_content_length(request, max_bytes, expansion=1.4)
+    decoder = Base64Decoder(max_bytes)
+    async for chunk in _stream(request):
+        decoder.feed(chunk)
+    return decoder.finish()
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytearray:
+    """Read a multipart upload in chunks with the same size limit"""
+    data = bytearray()
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            return data
+        data += chunk
+        if len(data) > max_bytes:
+            raise _too_large(max_bytes)
@@ -0,0 +1,75 @@
+"""
+NER throughput (documents per second) at different `nlp.pipe` batch sizes.
+
+    python benchmarks/ner_throughput.py --cards json_data --repeat 20
+
+Every card in `--cards` is written out as OCR would read it, one field per
+line, and the whole set is pushed through NERProcessor `--repeat` times: once
+a text at a time with process_text, as the single-card endpoints do, then with
+process_texts at each batch size, as batches and jobs do. The best of
+`--rounds` timings is reported, with the speed-up over one text at a time.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Module.ner_processor import NERProcessor
+
+
+def load_texts(directory):
+    texts = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            card = json.load(f)
+        lines = [f"ID Card - {card.get('user_id', '')}"]
+        lines += [f"{field.replace('_', ' ').capitalize()}: {value}" for field, value in card["extracted_fields"].items()]
+        texts.append("\n".join(lines))
+    return texts
+
+
+def best_of(rounds, run):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", default="json_data")
+    parser.add_argument("--model", default="trained_models/ner")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the card set per timing")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--batch-sizes", type=parse_sizes, default=[1, 8, 32, 128, 512])
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    texts = load_texts(args.cards) * args.repeat
+    ner = NERProcessor(model_path=args.model, n_process=args.n_process)
+    print(f"{len(texts)} texts from {args.cards}, pipes {ner.nlp.pipe_names}, n_process={args.n_process}")
+    # Load the model and warm its caches before timing
+    ner.process_texts(texts[:64])
+
+    single = best_of(args.rounds, lambda: [ner.process_text(text) for text in texts])
+    print(f"{'batch_size':>10} {'docs/s':>9} {'speed-up':>9}")
+    print(f"{'single':>10} {len(texts) / single:>9.0f} {1.0:>8.2f}x")
+    for batch_size in args.batch_sizes:
+        ner.batch_size = batch_size
+        elapsed = best_of(args.rounds, lambda: ner.process_texts(texts))
+        print(f"{batch_size:>10} {len(texts) / elapsed:>9.0f} {single / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare per-card OCR latency of the pytesseract and tesserocr backends.
+
+    python benchmarks/ocr_backends.py --images output_images --limit 50 --threads 4
+
+Each backend reads the same preprocessed cards (words, boxes and confidences)
+with the card config used by OCRProcessor.read_text. Cards are first run one at a time (latency), then
+spread over a thread pool (throughput). Backends that are not installed are
+reported and skipped.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+from Module.ocr_processor import OCRProcessor
+from Module.ocr_backends import create_backend
+
+
+def load_cards(processor, directory, limit):
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith((".png", ".jpg", ".jpeg")))
+    return [processor.preprocess_image(Image.open(os.path.join(directory, name))) for name in names[:limit]]
+
+
+def bench(backend, cards, config, threads):
+    # The first call pays engine start-up; keep it out of the steady-state numbers
+    start = time.perf_counter()
+    backend.image_to_result(cards[0], config)
+    first_call = time.perf_counter() - start
+
+    latencies = []
+    for card in cards:
+        start = time.perf_counter()
+        backend.image_to_result(card, config)
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Warm one engine per thread before timing
+        list(pool.map(lambda card: backend.image_to_result(card, config), cards[:threads]))
+        start = time.perf_counter()
+        list(pool.map(lambda card: backend.image_to_result(card, config), cards))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "first_call_ms": first_call * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if len(latencies) > 1 else latencies[0] * 1000,
+        "cards_per_sec": len(cards) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="output_images")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--config", default="config.json")
+    args = parser.parse_args()
+
+    processor = OCRProcessor(args.config)
+    # Every card is read by every backend, never served from the index or refused by the gate
+    processor.duplicates = None
+    processor.quality = None
+    cards = load_cards(processor, args.images, args.limit)
+    tessdata_path = processor.config["tesseract"].get("tessdata_path") or os.getenv("TESSDATA_PREFIX")
+    print(f"{len(cards)} cards from {args.images}, {args.threads} threads")
+
+    print(f"{'backend':<12} {'first call':>11} {'p50':>9} {'p95':>9} {'cards/s':>9}")
+    for name in ("pytesseract", "tesserocr"):
+        try:
+            backend = create_backend(name, tessdata_path)
+        except ImportError as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        try:
+            result = bench(backend, cards, processor.card_tesseract_config, args.threads)
+        except Exception as e:
+            print(f"{name:<12} failed: {e}")
+            continue
+        finally:
+            backend.close()
+        print(f"{name:<12} {result['first_call_ms']:>9.1f}ms {result['p50_ms']:>7.1f}ms "
+              f"{result['p95_ms']:>7.1f}ms {result['cards_per_sec']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Sweep OCR concurrency against tesseract's OpenMP thread limit on this host.
+
+    python benchmarks/ocr_concurrency.py --images output_images --limit 40
+
+Every combination of concurrent recognitions (`max_concurrent`) and OpenMP
+threads per recognition (`thread_limit`) pushes the same cards through the full
+pipeline (decode, preprocessing, OCR and NER) from that many request threads,
+and reports cards per second and p95 latency. libtesseract reads the thread
+limit once when it is loaded, so each thread limit runs in a fresh process.
+The fastest setting is printed as an `ocr.concurrency` block for config.json.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Module.concurrency import available_cores
+
+
+def load_cards(directory, limit):
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith((".png", ".jpg", ".jpeg")))
+    cards = []
+    for name in names[:limit]:
+        with open(os.path.join(directory, name), "rb") as f:
+            cards.append(f.read())
+    return cards
+
+
+def run_thread_limit(args, thread_limit, pool_sizes):
+    """Time every pool size at one thread limit; runs in its own process"""
+    from Module.concurrency import OCRGovernor
+    from Module.ocr_processor import OCRProcessor
+
+    cards = load_cards(args.images, args.limit)
+    ner = None
+    for pool_size in pool_sizes:
+        processor = OCRProcessor(args.config, ner=ner)
+        ner = processor.ner
+        # The warm-up would otherwise index the cards and the timed run serve them as near duplicates
+        processor.duplicates = None
+        processor.quality = None
+        processor.governor = OCRGovernor(pool_size, thread_limit)
+
+        def timed(card):
+            start = time.perf_counter()
+            processor.process_id_card(card)
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            # Warm one OCR engine per thread before timing
+            list(pool.map(timed, cards[:pool_size]))
+            start = time.perf_counter()
+            latencies = sorted(pool.map(timed, cards))
+            elapsed = time.perf_counter() - start
+        processor.ocr_backend.close()
+
+        print(json.dumps({
+            "max_concurrent": pool_size,
+            "thread_limit": thread_limit,
+            "cards_per_sec": len(cards) / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000
+        }), flush=True)
+
+
+def sweep(args, pool_sizes, thread_limits):
+    results = []
+    for thread_limit in thread_limits:
+        command = [
+            sys.executable, os.path.abspath(__file__),
+            "--images", args.images, "--limit", str(args.limit), "--config", args.config,
+            "--pool-sizes", ",".join(map(str, pool_sizes)), "--run-thread-limit", str(thread_limit)
+        ]
+        env = {**os.environ, "OMP_THREAD_LIMIT": str(thread_limit)}
+        output = subprocess.run(command, env=env, capture_output=True, text=True)
+        if output.returncode:
+            print(f"thread_limit={thread_limit} failed:\n{output.stderr}")
+            continue
+        for line in output.stdout.splitlines():
+            if line.startswith("{"):
+                result = json.loads(line)
+                results.append(result)
+                print(f"{result['max_concurrent']:>10} {result['thread_limit']:>12} "
+                      f"{result['cards_per_sec']:>9.2f} {result['p50_ms']:>8.0f}ms {result['p95_ms']:>8.0f}ms")
+    return results
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size]
+
+
+def main():
+    cores = available_cores()
+    # Powers of two up to twice the core count, plus the core count itself
+    default_sizes = sorted({2 ** i for i in range(8) if 2 ** i <= 2 * cores} | {cores})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="output_images")
+    parser.add_argument("--limit", type=int, default=40)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--pool-sizes", type=parse_sizes, default=default_sizes)
+    parser.add_argument("--thread-limits", type=parse_sizes, default=[size for size in default_sizes if size <= cores])
+    parser.add_argument("--run-thread-limit", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_thread_limit:
+        run_thread_limit(args, args.run_thread_limit, args.pool_sizes)
+        return
+
+    print(f"{cores} cores, {args.limit} cards from {args.images}")
+    print(f"{'concurrent':>10} {'thread_limit':>12} {'cards/s':>9} {'p50':>10} {'p95':>10}")
+    results = sweep(args, args.pool_sizes, args.thread_limits)
+    if not results:
+        return
+    best = max(results, key=lambda result: result["cards_per_sec"])
+    print("\nFastest setting for this host (ocr.concurrency in config.json):")
+    print(json.dumps({"concurrency": {"max_concurrent": best["max_concurrent"], "thread_limit": best["thread_limit"]}}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
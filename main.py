@@ -40,7 +40,7 @@ def process_and_validate_cards():
             image_path = os.path.join(OUTPUT_DIR, filename)
             user_id = os.path.splitext(filename)[0]
             
-            # Process the image with OCR
+            # Process the image with OCR and NER in a single pass
             ocr_result = ocr_processor.process_id_card(image_path)
             
             # Load original JSON for comparison
@@ -50,7 +50,7 @@ def process_and_validate_cards():
             
             # Compare and calculate accuracy
             original_fields = original_data["extracted_fields"]
-            extracted_fields = ocr_result["extracted_fields"]
+            extracted_fields = {field: value["text"] for field, value in ocr_result.fields.items()}
             field_accuracy = {}
             
             for field in original_fields:
@@ -75,12 +75,12 @@ def process_and_validate_cards():
             # Store results
             result = {
                 "user_id": user_id,
-                "confidence": ocr_result["confidence"],
+                "confidence": ocr_result.overall_confidence,
                 "accuracy": overall_accuracy,
                 "field_accuracy": field_accuracy,
                 "extracted_fields": extracted_fields,
                 "original_fields": original_fields,
-                "raw_text": ocr_result["raw_text"]
+                "raw_text": ocr_result.raw_text
             }
             results.append(result)
     
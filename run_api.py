@@ -1,8 +1,24 @@
+import argparse
 import uvicorn
 import json
 import os
 
+def __getattr__(name):
+    # `from run_api import app` keeps working without importing the app in the pre-fork parent
+    if name == "app":
+        from api.main import app
+        return app
+    raise AttributeError(name)
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the ID Card Processing API")
+    parser.add_argument("--prefork", action="store_true",
+                        help="production mode: load the model once and fork worker processes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: api.workers or the CPU count)")
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
     # Create necessary directories
     os.makedirs("temp", exist_ok=True)
     os.makedirs("logs", exist_ok=True)
@@ -14,9 +30,17 @@ def main():
     # Get API settings
     api_config = config.get("api", {})
     host = api_config.get("host", "0.0.0.0")
-    port = api_config.get("port", 8000)
+    port = args.port or api_config.get("port", 8000)
     debug = api_config.get("debug", False)
     
+    if args.prefork:
+        from api.prefork import PreforkServer
+
+        server = PreforkServer.from_config("config.json", port=port, workers=args.workers)
+        print(f"Starting API server on {host}:{port} with {server.workers} workers")
+        server.serve()
+        return
+
     print(f"Starting API server on {host}:{port}")
     print("API Documentation will be available at http://localhost:8000/docs")
     
@@ -29,4 +53,4 @@ def main():
     )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
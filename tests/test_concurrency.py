@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from Module.concurrency import OCRGovernor
+
+@pytest.fixture(autouse=True)
+def omp_env(monkeypatch):
+    # The governor sets OMP_THREAD_LIMIT process-wide; restore it after each test
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "1")
+
+def test_cores_are_split_between_processes_and_threads():
+    assert OCRGovernor.from_config({}, cores=8, processes=2).slots == 4
+    assert OCRGovernor.from_config({"thread_limit": 2}, cores=8, processes=2).slots == 2
+    assert OCRGovernor.from_config({}, cores=2, processes=4).slots == 1
+    assert OCRGovernor.from_config({"max_concurrent": 3}, cores=8, processes=2).slots == 3
+
+    OCRGovernor.from_config({"thread_limit": 4}, cores=8, processes=1)
+    assert os.environ["OMP_THREAD_LIMIT"] == "4"
+
+def test_slots_bound_concurrent_calls():
+    governor = OCRGovernor(slots=2)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def recognize(_):
+        with governor.slot():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(recognize, range(12)))
+
+    assert max(peak) == 2
+    stats = governor.stats()
+    assert stats["in_use"] == 0
+    assert stats["waits"] > 0
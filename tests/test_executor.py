@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import pytest
+from api.executor import WorkerPool, QueueFullError
+
+def test_pool_runs_blocking_work():
+    pool = WorkerPool(max_workers=2, max_queue_size=2)
+    try:
+        result = asyncio.run(pool.run(sum, [1, 2, 3]))
+    finally:
+        pool.shutdown()
+    assert result == 6
+    assert pool.stats()["in_flight"] == 0
+
+def test_pool_rejects_when_full():
+    pool = WorkerPool(max_workers=1, max_queue_size=1, retry_after_seconds=5)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.queue_depth == 1
+        with pytest.raises(QueueFullError) as exc_info:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+    assert error.retry_after == 5
+    assert pool.stats()["rejected"] == 1
+
+def test_session_keeps_at_most_max_workers_tasks_in_the_executor():
+    pool = WorkerPool(max_workers=2, max_queue_size=1)
+    release = threading.Event()
+
+    async def scenario():
+        async with pool.session() as session:
+            tasks = [session.submit(release.wait) for _ in range(10)]
+            await asyncio.sleep(0.05)
+            # A job admitted next only waits behind the session's running tasks
+            assert pool.queue_depth == 0
+            single = asyncio.ensure_future(pool.run(sum, [1, 2]))
+            await asyncio.sleep(0.05)
+            assert pool.queue_depth == 1
+            release.set()
+            await asyncio.gather(*tasks)
+            return await single
+
+    try:
+        assert asyncio.run(scenario()) == 3
+    finally:
+        release.set()
+        pool.shutdown()
+    assert pool.stats()["in_flight"] == 0
@@ -0,0 +1,45 @@
+import json
+import pytest
+from Module.field_extractor import FieldExtractor
+from Module.ner_processor import NERProcessor
+
+LICENSE_TEXT = (
+    "DRIVER LICENSE Document type: Driver's License Name: Maria Lopez License No: D12345678 "
+    "DOB: 1990-04-12 Address: 12 Main St, Springfield Expires: 2030-04-12 Issued by: Motor Vehicles Department"
+)
+
+@pytest.fixture(scope="module")
+def fields():
+    with open("config.json") as f:
+        return FieldExtractor.from_config(json.load(f)["ner"])
+
+def test_one_scan_finds_labelled_values_in_any_order(fields):
+    text = "ID Card - stu_001 Valid upto: 2028 ROLL  NUMBER: 22JNT5377 Name: Nathan Henry Blood group: O+"
+    values = {item.field: item for item in fields.scan(text)}
+    assert list(values) == ["valid_upto", "roll_number", "name"]
+    assert values["roll_number"].text == "22JNT5377"
+    # A value runs to the next configured label, so unknown labels stay in it
+    assert values["name"].text == "Nathan Henry Blood group: O+"
+    assert text[values["valid_upto"].start:values["valid_upto"].end] == "2028"
+
+def test_document_type_decides_required_fields(fields):
+    assert fields.document_type(["name", "id_number", "address", "expiry_date"]) == "drivers_license"
+    assert fields.document_type(["name"]) == "student_id"
+    assert fields.required_fields("student_id") == ["name", "college", "roll_number", "branch", "valid_upto"]
+    assert "address" not in fields.required_fields("passport")
+
+    with pytest.raises(ValueError):
+        FieldExtractor.from_config({"fields": {"name": {}}, "document_types": {"passport": ["name", "nationality"]}})
+
+def test_labels_overrule_model_entities_on_other_documents(fields):
+    ner = NERProcessor("trained_models/ner", fields=fields)
+    entities = ner.process_text(LICENSE_TEXT)
+    # The model is trained on student cards and tags "Motor Vehicles" as a name
+    assert entities["name"] == {"text": "Maria Lopez", "confidence": 1.0}
+    assert entities["document_type"]["text"] == "Driver's License"
+    assert entities["issuing_authority"]["confidence"] == pytest.approx(0.95)
+    assert "college" not in entities and "roll_number" not in entities
+    assert fields.document_type(entities) == "drivers_license"
+
+    # Values outside the length limits are dropped
+    assert "id_number" not in ner.process_text("Name: Maria Lopez License No: D12")
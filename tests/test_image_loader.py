@@ -0,0 +1,43 @@
+import io
+import cv2
+import pytest
+from PIL import Image
+from Module.image_loader import ImageLoader, ImageTooLargeError, InvalidImageError
+
+def encoded(size, format="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buffer, format=format)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("format", ["JPEG", "PNG"])
+def test_decodes_to_grayscale_no_narrower_than_target(format):
+    loader = ImageLoader(target_width=800)
+    gray = loader.load(encoded((4000, 3000), format))
+    # 4000 // 4 = 1000 is the smallest reduction still covering 800px
+    assert gray.shape == (750, 1000)
+    assert gray.ndim == 2
+
+    assert loader.load(encoded((600, 300), format)).shape == (300, 600)
+    assert ImageLoader().load(encoded((4000, 3000), format)).shape == (3000, 4000)
+
+def test_limits_are_checked_before_decoding(monkeypatch, tmp_path):
+    def imdecode(*args):
+        raise AssertionError("decoded an image over the limit")
+
+    monkeypatch.setattr(cv2, "imdecode", imdecode)
+    data = encoded((4000, 3000))
+    with pytest.raises(ImageTooLargeError):
+        ImageLoader(max_pixels=10_000_000).load(data)
+    with pytest.raises(ImageTooLargeError):
+        ImageLoader(max_bytes=len(data) - 1).load(data)
+
+    path = tmp_path / "card.jpg"
+    path.write_bytes(data)
+    with pytest.raises(ImageTooLargeError):
+        ImageLoader(max_bytes=len(data) - 1).load(str(path))
+
+def test_undecodable_input_is_invalid():
+    with pytest.raises(InvalidImageError):
+        ImageLoader().load(b"\0" * 4096)
+    with pytest.raises(InvalidImageError):
+        ImageLoader().load("missing.png")
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from api.jobs import JobRunner, JobStore
+
+async def fake_batch(items, threshold):
+    return [{"index": index, "filename": name, "status": "success"} for index, name, _ in items]
+
+def drain(runner, job_id):
+    async def scenario():
+        runner.start()
+        lines = [line async for line in runner.stream_results(job_id)]
+        await runner.stop()
+        return lines
+    return asyncio.run(scenario())
+
+def test_job_resumes_after_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    job_id = JobStore(db_path).create_job([("a.png", b"a"), ("b.png", "output_images/b.png")], 0.7)
+
+    # A new store on the same file plays the part of a restarted API
+    store = JobStore(db_path)
+    assert store.get_job(job_id)["pending"] == 2
+
+    lines = drain(JobRunner(store, fake_batch, chunk_size=1, poll_interval=0.01), job_id)
+
+    assert [json.loads(line)["filename"] for line in lines] == ["a.png", "b.png"]
+    job = store.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+
+def test_unknown_job(tmp_path):
+    assert JobStore(str(tmp_path / "jobs.sqlite")).get_job("missing") is None
+
+def test_store_is_never_used_on_the_event_loop(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job_id = store.create_job([("a.png", b"a"), ("b.png", b"b")], 0.7)
+    on_loop = []
+
+    def checked(method):
+        def call(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(method.__name__)
+            except RuntimeError:
+                pass
+            return method(*args, **kwargs)
+        return call
+
+    for name in ("next_pending", "save_results", "get_job", "results_after"):
+        setattr(store, name, checked(getattr(store, name)))
+
+    lines = drain(JobRunner(store, fake_batch, chunk_size=1, poll_interval=0.01), job_id)
+    assert len(lines) == 2
+    assert not on_loop
@@ -0,0 +1,86 @@
+import numpy as np
+import cv2
+from Module.extraction_result import ExtractionResult
+from Module.id_card import IdCard
+from Module.near_duplicates import CardFingerprint, NearDuplicateIndex
+
+FIELDS = {
+    "name": "Nathan Henry",
+    "college": "JNTU Kakinada",
+    "roll_number": "22JNT5377",
+    "branch": "Computer Science",
+    "valid_upto": "2028"
+}
+
+def card_gray(**fields):
+    card = IdCard.render_card("stu_001", {**FIELDS, **fields}, "resource/DejaVuSans.ttf")
+    return np.asarray(card.convert("L"))
+
+def result(name):
+    return ExtractionResult(raw_text=f"Name: {name}", fields={"name": {"text": name, "confidence": 0.9}})
+
+def jpeg(image, quality):
+    _, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+
+def indexed(*cards):
+    index = NearDuplicateIndex(max_entries=4)
+    for name, card in cards:
+        index.add(CardFingerprint.of(card), "settings", result(name))
+    return index
+
+def test_copies_of_a_card_are_found():
+    card = card_gray()
+    index = indexed(("Nathan Henry", card), ("Laura Henson", card_gray(name="Laura Henson")))
+    copies = [
+        jpeg(card, 40),
+        cv2.resize(card, (300, 150), interpolation=cv2.INTER_AREA),
+        cv2.resize(card, (1000, 500), interpolation=cv2.INTER_CUBIC),
+        cv2.convertScaleAbs(card, alpha=0.8, beta=30)
+    ]
+    for copy in copies:
+        hit = index.lookup(CardFingerprint.of(copy), "settings")
+        assert hit.fields["name"]["text"] == "Nathan Henry"
+        assert hit.near_duplicate
+    assert index.stats()["hits"] == len(copies)
+
+def test_cards_differing_in_one_character_are_not_duplicates():
+    index = indexed(("Nathan Henry", card_gray()))
+    for fields in ({"valid_upto": "2029"}, {"roll_number": "22JNT5378"}, {"name": "Nathan Henri"}):
+        assert index.lookup(CardFingerprint.of(card_gray(**fields)), "settings") is None
+
+def test_hit_is_a_flagged_copy_for_the_same_settings_only():
+    card = card_gray()
+    stored = result("Nathan Henry")
+    index = NearDuplicateIndex()
+    index.add(CardFingerprint.of(card), "settings", stored)
+
+    hit = index.lookup(CardFingerprint.of(card), "settings")
+    assert hit.near_duplicate and not stored.near_duplicate
+    assert hit.to_response(0.7)["near_duplicate"] is True
+    # Results from other pipeline settings or models never match
+    assert index.lookup(CardFingerprint.of(card), "other settings") is None
+
+def test_least_recently_used_entry_is_evicted():
+    index = NearDuplicateIndex(max_entries=2)
+    names = ["Nathan Henry", "Laura Henson", "Kelly Bird"]
+    fingerprints = {name: CardFingerprint.of(card_gray(name=name)) for name in names}
+    index.add(fingerprints[names[0]], "s", result(names[0]))
+    index.add(fingerprints[names[1]], "s", result(names[1]))
+    assert index.lookup(fingerprints[names[0]], "s") is not None
+    index.add(fingerprints[names[2]], "s", result(names[2]))
+
+    assert index.lookup(fingerprints[names[1]], "s") is None
+    assert index.lookup(fingerprints[names[0]], "s") is not None
+    assert index.stats()["entries"] == 2
+
+def test_expired_entries_do_not_match():
+    index = NearDuplicateIndex(ttl_seconds=-1)
+    fingerprint = CardFingerprint.of(card_gray())
+    index.add(fingerprint, "s", result("Nathan Henry"))
+    assert index.lookup(fingerprint, "s") is None
+    assert index.stats()["entries"] == 0
+
+def test_index_is_off_unless_enabled():
+    assert NearDuplicateIndex.from_config({}) is None
+    assert NearDuplicateIndex.from_config({"enabled": True, "max_difference": 20}).max_difference == 20
@@ -0,0 +1,52 @@
+import spacy
+from Module.model_registry import ModelRegistry
+from Module.ner_processor import NERProcessor
+
+CARDS = [
+    "Name: Nathan Henry\nCollege: JNTU Kakinada\nRoll number: 22JNT5377\nValid upto: 2028",
+    "Name: Laura Henson\nCollege: RGMCET Nandyal\nRoll number: 22RGM8892\nValid upto: 2026",
+    "Name: Kelly Bird\nCollege: Anna University\nRoll number: 22ANN8918\nValid upto: 2026"
+]
+
+def test_batch_matches_one_text_at_a_time():
+    ner = NERProcessor("trained_models/ner", batch_size=2)
+    confidences = [None, [90.0] * len(CARDS[1].split()), None]
+    batch = ner.process_texts(iter(CARDS), iter(confidences))
+    assert batch == [ner.process_text(text, word_confidences=conf) for text, conf in zip(CARDS, confidences)]
+    assert batch[0]["roll_number"]["text"] == "22JNT5377"
+    assert batch[1]["roll_number"]["confidence"] < batch[0]["roll_number"]["confidence"]
+
+def test_pipes_the_model_does_not_need_are_not_loaded(tmp_path):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("tok2vec")
+    listener = {"@architectures": "spacy.Tok2VecListener.v1", "width": 96, "upstream": "tok2vec"}
+    nlp.add_pipe("tagger", config={"model": {"@architectures": "spacy.Tagger.v2", "tok2vec": listener}})
+    nlp.add_pipe("ner", config={"model": {
+        "@architectures": "spacy.TransitionBasedParser.v2",
+        "state_type": "ner",
+        "extra_state_tokens": False,
+        "hidden_width": 64,
+        "maxout_pieces": 2,
+        "use_upper": True,
+        "tok2vec": listener
+    }})
+    nlp.add_pipe("sentencizer")
+    nlp.get_pipe("ner").add_label("NAME")
+    nlp.get_pipe("tagger").add_label("NN")
+    nlp.initialize()
+    nlp.to_disk(tmp_path)
+
+    registry = ModelRegistry()
+    assert registry.unused_pipes(str(tmp_path)) == ["tagger", "sentencizer"]
+    # ner keeps the tok2vec component it listens to
+    assert registry.get(str(tmp_path)).pipe_names == ["tok2vec", "ner"]
+
+def test_evaluate_model_scores_batched_predictions():
+    ner = NERProcessor("trained_models/ner", batch_size=2)
+    text = "Name: Nathan Henry Roll Number: 22JNT5377"
+    start = text.index("Nathan")
+    roll = text.index("22JNT")
+    test_data = [(text, {"entities": [(start, start + 12, "NAME"), (roll, roll + 9, "ROLL_NUMBER")]})] * 3
+    results = ner.evaluate_model(test_data)
+    assert len(results["examples"]) == 3
+    assert results["recall"] == 1.0
@@ -0,0 +1,385 @@
+import asyncio
+import base64
+import io
+import os
+import time
+import pytest
+import pytesseract
+from PIL import Image
+from fastapi.testclient import TestClient
+from api import main, tasks
+from Module.id_card import IdCard
+from Module.model_registry import ModelRegistry
+from Module.near_duplicates import NearDuplicateIndex
+from Module.quality import QualityGate
+from Module.result_cache import ResultCache
+from Module.ocr_backends import DATA_KEYS, OCRResult, PytesseractBackend, parse_config
+
+CARD_TEXT = (
+    "ID Card - stu_001\n"
+    "Name: Nathan Henry\n"
+    "College: JNTU Kakinada\n"
+    "Roll number: 22JNT5377\n"
+    "Branch: Computer Science\n"
+    "Valid upto: 2028\n"
+)
+
+client = TestClient(main.app)
+
+def page_data(text, conf=95.0):
+    """pytesseract.image_to_data output for a page of text, one word row per word"""
+    data = {key: [] for key in DATA_KEYS}
+    for line_num, line in enumerate(text.splitlines(), 1):
+        for word_num, word in enumerate(line.split(), 1):
+            row = (5, 1, 1, 1, line_num, word_num, 10 * word_num, 20 * line_num, 9, 15, conf, word)
+            for key, value in zip(DATA_KEYS, row):
+                data[key].append(value)
+    return data
+
+class CountingTokenizer:
+    """Wraps the spaCy tokenizer to count how many documents are created"""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.tokenizer(text)
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+def card_png(width=600):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, 300), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(main, "result_cache", None)
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    monkeypatch.setattr(tasks.get_processor(), "ocr_backend", PytesseractBackend())
+    # The warm-up card matches the built-in template, which reads fields with image_to_data
+    monkeypatch.setattr(tasks.get_processor(), "templates", None)
+    # Blank test cards have no contrast and would be refused by the quality gate,
+    # and every one after the first would be a near duplicate
+    monkeypatch.setattr(tasks.get_processor(), "quality", None)
+    monkeypatch.setattr(tasks.get_processor(), "duplicates", None)
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda *args, **kwargs: page_data(CARD_TEXT))
+
+@pytest.fixture
+def counting_tokenizer(monkeypatch):
+    nlp = tasks.get_processor().ner.nlp
+    counter = CountingTokenizer(nlp.tokenizer)
+    monkeypatch.setattr(nlp, "tokenizer", counter)
+    return counter
+
+def test_model_loaded_once():
+    processor = tasks.get_processor()
+    models = ModelRegistry.default().loaded_models()
+    assert len(models) == 1
+    assert processor.ner.nlp is next(iter(models.values()))
+
+def test_ner_runs_once_per_request(fake_tesseract, counting_tokenizer):
+    response = client.post(
+        "/extract/file",
+        files={"file": ("card.png", card_png(), "image/png")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["extracted_fields"]["roll_number"] == "22JNT5377"
+    assert data["status"] == "success"
+    assert counting_tokenizer.calls == 1
+
+def test_undecodable_upload_is_rejected():
+    response = client.post(
+        "/extract/file",
+        files={"file": ("invalid.txt", b"not an image", "text/plain")}
+    )
+    assert response.status_code == 400
+
+def test_batch_keeps_order_and_batches_ner(fake_tesseract, counting_tokenizer, monkeypatch):
+    nlp = tasks.get_processor().ner.nlp
+    pipe_calls = []
+    original_pipe = nlp.pipe
+
+    def counting_pipe(texts, *args, **kwargs):
+        pipe_calls.append(texts)
+        return original_pipe(texts, *args, **kwargs)
+
+    monkeypatch.setattr(nlp, "pipe", counting_pipe)
+
+    image = base64.b64encode(card_png()).decode()
+    invalid = base64.b64encode(b"not an image").decode()
+    response = client.post("/extract/batch", json={"images": [image, invalid, image]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2]
+    assert results[0]["status"] == "success"
+    assert results[1]["status"] == "error"
+    assert results[2]["extracted_fields"]["name"] == "Nathan Henry"
+    assert len(pipe_calls) == 1
+    assert counting_tokenizer.calls == 2
+
+def test_batch_rejects_invalid_multipart_threshold():
+    files = [("files", ("card.png", card_png(), "image/png"))]
+    for threshold in ("abc", "5"):
+        response = client.post("/extract/batch", files=files, data={"threshold": threshold})
+        assert response.status_code == 422
+    assert client.post("/extract/batch", json={"images": ["x"], "threshold": 5}).status_code == 422
+
+def test_cascade_escalates_only_failing_cards(fake_tesseract, monkeypatch):
+    processor = tasks.get_processor()
+    monkeypatch.setattr(processor, "passes", processor._build_passes({
+        "enabled": True,
+        "passes": [
+            {"name": "fast", "preprocessing": {"preset": "fast", "resize": False}, "psm": 6},
+            {"name": "accurate", "preprocessing": {"preset": "accurate", "resize_width": 800}, "psm": 4}
+        ]
+    }))
+    reads = []
+
+    def image_to_data(image, config="", **kwargs):
+        # The fast pass keeps the upload width; only 600px cards lose their branch in it
+        reads.append((image.shape[1], config))
+        if image.shape[1] == 600:
+            return page_data(CARD_TEXT.replace("Branch: Computer Science\n", ""))
+        return page_data(CARD_TEXT)
+
+    monkeypatch.setattr(pytesseract, "image_to_data", image_to_data)
+
+    images = [base64.b64encode(card_png(width)).decode() for width in (600, 640)]
+    response = client.post("/extract/batch", json={"images": images})
+
+    results = response.json()["results"]
+    assert [item["ocr_pass"] for item in results] == ["accurate", "fast"]
+    assert all(item["status"] == "success" for item in results)
+    assert len(reads) == 3
+    assert "--psm 4" in reads[-1][1]
+
+def test_raw_body_upload(fake_tesseract):
+    response = client.post(
+        "/extract/raw",
+        data=card_png(),
+        headers={"Content-Type": "image/png"}
+    )
+    assert response.status_code == 200
+    assert response.json()["extracted_fields"]["branch"] == "Computer Science"
+
+def test_raw_base64_body_upload(fake_tesseract):
+    response = client.post(
+        "/extract/raw?encoding=base64",
+        data=base64.encodebytes(card_png()),
+        headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+
+def test_oversize_upload_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "max_image_bytes", 1024)
+    response = client.post(
+        "/extract/raw",
+        data=b"\0" * 4096,
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert response.status_code == 413
+
+    response = client.post("/extract", json={"image": base64.b64encode(b"\0" * 4096).decode()})
+    assert response.status_code == 413
+
+def test_oversize_image_is_rejected_from_header(monkeypatch):
+    monkeypatch.setattr(tasks.get_processor().loader, "max_pixels", 100_000)
+    response = client.post(
+        "/extract/raw",
+        data=card_png(),
+        headers={"Content-Type": "image/png"}
+    )
+    assert response.status_code == 413
+    assert "MP" in response.json()["detail"]
+
+    # The legacy endpoint refuses it the same way instead of reporting a failed card
+    response = client.post("/process-id-card", files={"file": ("card.png", card_png(), "image/png")})
+    assert response.status_code == 413
+
+def test_unreadable_image_is_rejected_before_ocr(fake_tesseract, monkeypatch):
+    monkeypatch.setattr(tasks.get_processor(), "quality", QualityGate(min_contrast=10, min_resolution=400))
+
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("OCR ran on a rejected image")
+    monkeypatch.setattr(pytesseract, "image_to_data", no_ocr)
+
+    response = client.post("/extract/raw", data=card_png(width=150), headers={"Content-Type": "image/png"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "rejected"
+    assert body["rejection"]["reason"] == "image_quality"
+    assert body["rejection"]["failed_checks"] == ["contrast", "resolution"]
+    assert body["missing_fields"] == ["name", "college", "roll_number", "branch", "valid_upto"]
+
+    small = base64.b64encode(card_png(width=150)).decode()
+    response = client.post("/extract/batch", json={"images": [small]})
+    assert response.json()["results"][0]["status"] == "rejected"
+    assert 'idcard_quality_rejections_total{check="resolution"}' in client.get("/metrics").text
+
+def test_reencoded_card_is_served_from_near_duplicate_index(fake_tesseract, monkeypatch):
+    monkeypatch.setattr(tasks.get_processor(), "duplicates", NearDuplicateIndex())
+    calls = []
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda *args, **kwargs: calls.append(1) or page_data(CARD_TEXT))
+
+    card = IdCard.render_card("stu_001", {"name": "Nathan Henry", "roll_number": "22JNT5377"}, "resource/DejaVuSans.ttf")
+    png, jpeg = io.BytesIO(), io.BytesIO()
+    card.save(png, format="PNG")
+    card.resize((450, 225)).save(jpeg, format="JPEG", quality=60)
+
+    first = client.post("/extract/raw", data=png.getvalue(), headers={"Content-Type": "image/png"}).json()
+    assert first["near_duplicate"] is False
+    ocr_calls = len(calls)
+
+    second = client.post("/extract/raw", data=jpeg.getvalue(), headers={"Content-Type": "image/jpeg"}).json()
+    assert second["near_duplicate"] is True
+    assert second["extracted_fields"] == first["extracted_fields"]
+    response = client.post("/extract/batch", json={"images": [base64.b64encode(jpeg.getvalue()).decode()]})
+    assert response.json()["results"][0]["near_duplicate"] is True
+    assert len(calls) == ocr_calls
+
+    # Cards read in a batch are indexed too
+    other = IdCard.render_card("stu_002", {"name": "Laura Henson", "roll_number": "22RGM8892"}, "resource/DejaVuSans.ttf")
+    png = io.BytesIO()
+    other.save(png, format="PNG")
+    response = client.post("/extract/batch", json={"images": [base64.b64encode(png.getvalue()).decode()]})
+    assert response.json()["results"][0]["near_duplicate"] is False
+    response = client.post("/extract/raw", data=png.getvalue(), headers={"Content-Type": "image/png"})
+    assert response.json()["near_duplicate"] is True
+
+def test_repeat_upload_is_served_from_result_cache(fake_tesseract, monkeypatch):
+    # Settings the warm-up would capture; the event loop must never load the processor itself
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+    monkeypatch.setattr(main, "cache_settings", tasks.cache_settings())
+    loaded_on_loop = []
+    get_processor = tasks.get_processor
+
+    def checked_get_processor(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            loaded_on_loop.append(True)
+        except RuntimeError:
+            pass
+        return get_processor(*args, **kwargs)
+
+    monkeypatch.setattr(tasks, "get_processor", checked_get_processor)
+    files = {"file": ("card.png", card_png(), "image/png")}
+    first = client.post("/extract/file", files=files)
+    second = client.post("/extract/file", files=files)
+    batch = client.post("/extract/batch", files=[("files", ("card.png", card_png(), "image/png"))])
+
+    assert first.status_code == second.status_code == batch.status_code == 200
+    assert second.json()["extracted_fields"] == first.json()["extracted_fields"]
+    assert main.result_cache.stats()["hits"] == 2
+    assert not loaded_on_loop
+
+def test_metrics_cover_pipeline_stages(fake_tesseract):
+    client.post("/extract/file", files={"file": ("card.png", card_png(), "image/png")})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    for name in ("decode", "preprocess", "tesseract", "ner_model", "ner_postprocess"):
+        assert f'idcard_stage_duration_seconds_count{{stage="{name}"}}' in body
+    assert 'idcard_requests_total{endpoint="/extract/file",status="success"}' in body
+    assert "idcard_queue_depth 0.0" in body
+
+def test_profiling_requires_admin_token(fake_tesseract, monkeypatch):
+    monkeypatch.setattr(main, "admin_token", "secret")
+    response = client.post("/extract/file?profile=true", files={"file": ("card.png", card_png(), "image/png")})
+    assert response.status_code == 403
+
+def test_profiling_reports_stage_breakdown(fake_tesseract, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "admin_token", "secret")
+    monkeypatch.setattr(main, "profile_dir", str(tmp_path))
+    response = client.post(
+        "/extract/file?profile=true&trace_memory=true",
+        files={"file": ("card.png", card_png(), "image/png")},
+        headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    profile = response.json()["profile"]
+    assert {"decode", "preprocess", "tesseract", "ner_model", "ner_postprocess"} <= set(profile["stages"])
+    assert set(profile["memory_peak_bytes"]) == set(profile["stages"])
+    assert os.path.exists(profile["pstats_path"])
+
+def test_warm_up_card_is_not_indexed(fake_tesseract, monkeypatch):
+    processor = tasks.get_processor()
+    monkeypatch.setattr(processor, "duplicates", NearDuplicateIndex.from_config({"enabled": True}))
+    tasks.warm_up()
+    assert processor.duplicates.stats()["entries"] == 0
+
+def test_ready_after_warm_up(fake_tesseract):
+    with TestClient(main.app) as startup_client:
+        for _ in range(100):
+            response = startup_client.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.05)
+    assert response.status_code == 200
+    assert {"module_import", "processor_init", "tesseract", "ner_model"} <= set(response.json()["startup"])
+
+def test_model_reload_swaps_atomically(monkeypatch, tmp_path):
+    import spacy
+
+    monkeypatch.setattr(main, "admin_token", "secret")
+    processor = tasks.get_processor()
+    old_nlp = processor.ner.nlp
+    assert client.post("/admin/model/reload").status_code == 403
+
+    # A model that cannot tag the smoke card is rejected and the old one keeps serving
+    blank = spacy.blank("en")
+    blank.add_pipe("ner")
+    blank.initialize()
+    blank.to_disk(tmp_path / "blank")
+    response = client.post(
+        "/admin/model/reload",
+        json={"source_path": str(tmp_path / "blank")},
+        headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 422
+    assert processor.ner.nlp is old_nlp
+
+    response = client.post("/admin/model/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert processor.ner.nlp is not old_nlp
+    version = client.get("/version").json()
+    assert version["model_version"] == processor.ner.model_version
+    assert version["model_loaded_at"] == response.json()["model"]["loaded_at"]
+
+    # A pre-forked worker refuses, since the reload would not reach its siblings
+    monkeypatch.setenv("API_WORKER_ID", "1")
+    reloaded_nlp = processor.ner.nlp
+    response = client.post("/admin/model/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 409
+    assert processor.ner.nlp is reloaded_nlp
+
+def test_field_confidence_follows_ocr_confidence(fake_tesseract, monkeypatch):
+    page = OCRResult.from_data(page_data(CARD_TEXT))
+    assert page.text == CARD_TEXT.strip()
+    assert [page.line_ids.tolist().count(line) for line in range(6)] == [4, 3, 3, 3, 3, 3]
+    assert page.boxes.shape == (len(page), 4)
+
+    # Tesseract is unsure of the roll number only
+    page.confidences[page.words.index("22JNT5377")] = 40.0
+    reads = []
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda *args, **kwargs: reads.append(args) or page_data(CARD_TEXT))
+    result = tasks.get_processor().read_page_fields(page)
+
+    assert result.fields["roll_number"]["confidence"] == pytest.approx(0.4)
+    assert result.fields["name"]["confidence"] == pytest.approx(0.95)
+    assert not reads
+
+def test_parse_tesseract_config():
+    lang, oem, psm, variables = parse_config(
+        '-l eng --oem 3 --psm 6 --dpi 300 -c tessedit_char_whitelist="AB :"'
+    )
+    assert (lang, oem, psm) == ("eng", 3, 6)
+    assert variables == {"user_defined_dpi": "300", "tessedit_char_whitelist": "AB :"}
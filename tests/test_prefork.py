@@ -0,0 +1,44 @@
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def get_health(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+        return response.status
+
+def test_workers_are_recycled_without_dropping_requests():
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-c",
+         f"from api.prefork import PreforkServer; PreforkServer(host='127.0.0.1', port={port}, workers=2, max_requests=2).serve()"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True
+    )
+    try:
+        for _ in range(100):
+            try:
+                get_health(port)
+                break
+            except OSError:
+                time.sleep(0.1)
+        statuses = []
+        for _ in range(10):
+            statuses.append(get_health(port))
+            # Workers check their request count between event loop ticks
+            time.sleep(0.2)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output = server.communicate(timeout=30)[0]
+
+    assert statuses == [200] * 10
+    assert server.returncode == 0
+    assert "respawning" in output
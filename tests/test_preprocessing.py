@@ -0,0 +1,96 @@
+import copy
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+from Module.preprocessing import PRESETS, PreprocessingPipeline, card_crop, deskew, estimate_orientation, find_card
+
+def card():
+    image = Image.new("RGB", (600, 300), "white")
+    ImageDraw.Draw(image).text((20, 20), "Name: Nathan Henry", fill="black")
+    return image
+
+def test_config_toggles_stages():
+    pipeline = PreprocessingPipeline.from_config({
+        "preset": "accurate",
+        "deskew": False,
+        "denoise": {"method": "nlmeans"},
+        "resize_width": 800
+    })
+    assert "deskew" not in pipeline.stage_names
+    assert pipeline.stage_names.index("resize") < pipeline.stage_names.index("threshold")
+    assert dict(pipeline.stages)["denoise"] == {"method": "nlmeans"}
+    assert dict(pipeline.stages)["resize"]["width"] == 800
+
+    with pytest.raises(ValueError):
+        PreprocessingPipeline.from_config({"preset": "unknown"})
+
+def test_overrides_leave_presets_unchanged():
+    presets = copy.deepcopy(PRESETS)
+    first = PreprocessingPipeline.from_config({"preset": "accurate", "resize_width": 800, "threshold_method": "adaptive"})
+    second = PreprocessingPipeline.from_config({"preset": "accurate", "resize_width": 1600})
+    assert PRESETS == presets
+    assert dict(first.stages)["threshold"] == {"method": "adaptive"}
+    assert dict(second.stages)["resize"]["width"] == 1600
+    assert dict(second.stages)["threshold"] == {"method": "otsu"}
+
+@pytest.mark.parametrize("preset", ["fast", "accurate"])
+def test_presets_return_binary_grayscale(preset):
+    output = PreprocessingPipeline.from_config({"preset": preset, "resize_width": 1200})(card())
+    assert output.dtype == np.uint8
+    assert output.ndim == 2
+    assert set(np.unique(output)) <= {0, 255}
+    if preset == "fast":
+        assert output.shape == (600, 1200)
+
+@pytest.mark.parametrize("turns", [0, 1, 2, 3])
+@pytest.mark.parametrize("angle", [-6.0, 0.0, 3.0])
+def test_orientation_and_skew_are_estimated(turns, angle):
+    import cv2
+    from Module.id_card import IdCard
+    from api.tasks import WARMUP_FIELDS
+
+    gray = np.asarray(IdCard.render_card("stu_001", WARMUP_FIELDS, "resource/DejaVuSans.ttf").convert("L"))
+    h, w = gray.shape
+    skewed = cv2.warpAffine(gray, cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0), (w, h), borderValue=255)
+    rotated = np.ascontiguousarray(np.rot90(skewed, turns))
+
+    found_turns, found_angle = estimate_orientation((rotated < 128).astype(np.uint8))
+    assert (found_turns + turns) % 4 == 0
+    assert abs(found_angle + angle) < 0.5
+    assert deskew(rotated).shape == gray.shape
+
+def desk_photo(card, corners, size=(1000, 800)):
+    """A grayscale card warped onto `corners` of a darker, noisy desk"""
+    import cv2
+
+    h, w = card.shape
+    matrix = cv2.getPerspectiveTransform(np.float32([[0, 0], [w, 0], [w, h], [0, h]]), np.float32(corners))
+    desk = np.random.default_rng(0).normal(80, 8, size[::-1]).clip(0, 255).astype(np.uint8)
+    warped = cv2.warpPerspective(card, matrix, size)
+    inside = cv2.warpPerspective(np.full_like(card, 255), matrix, size) > 127
+    return np.where(inside, warped, desk)
+
+@pytest.mark.parametrize("turns", [0, 1])
+def test_card_is_cut_out_of_a_photo(turns):
+    from Module.id_card import IdCard
+    from api.tasks import WARMUP_FIELDS
+
+    gray = np.asarray(IdCard.render_card("stu_001", WARMUP_FIELDS, "resource/DejaVuSans.ttf").convert("L"))
+    assert find_card(gray) is None
+
+    if turns:
+        # Photographed on its side: the long edges run down the frame
+        gray = np.ascontiguousarray(np.rot90(gray))
+        corners = [[330, 60], [640, 80], [660, 720], [320, 700]]
+    else:
+        corners = [[170, 220], [840, 180], [860, 540], [150, 560]]
+    photo = desk_photo(gray, corners)
+
+    found = find_card(photo)
+    assert found is not None
+    assert min(np.abs(np.roll(found, k, axis=0) - corners).max() for k in range(4)) < 8
+
+    card = card_crop(photo)
+    h, w = card.shape
+    assert 1.8 < w / h < 2.2
+    assert card_crop(photo, width=600).shape[1] == 600
@@ -0,0 +1,56 @@
+import numpy as np
+import cv2
+from PIL import Image
+from Module.id_card import IdCard
+from Module.quality import QualityGate, assess
+
+FIELDS = {
+    "name": "Nathan Henry",
+    "college": "JNTU Kakinada",
+    "roll_number": "22JNT5377",
+    "branch": "Computer Science",
+    "valid_upto": "2028"
+}
+
+def card_gray():
+    card = IdCard.render_card("stu_001", FIELDS, "resource/DejaVuSans.ttf")
+    return np.asarray(card.convert("L"))
+
+def test_clean_card_passes():
+    gate = QualityGate(min_sharpness=10, min_contrast=10, min_resolution=200, max_glare=0.3)
+    report = assess(card_gray())
+    assert report.glare == 0.0  # White paper in a scan is not glare
+    assert gate.check(card_gray()) is None
+
+def test_blur_and_size_lower_the_scores():
+    gray = card_gray()
+    sharp = assess(gray)
+    blurred = assess(cv2.GaussianBlur(gray, (0, 0), 3))
+    assert blurred.sharpness < sharp.sharpness / 100
+    assert blurred.contrast < sharp.contrast
+
+    small = cv2.resize(gray, (150, 150 * gray.shape[0] // gray.shape[1]), interpolation=cv2.INTER_AREA)
+    assert assess(small).resolution == 150
+
+def test_glare_on_underexposed_paper():
+    gray = (card_gray() * 0.85).astype(np.uint8)
+    assert assess(gray).glare == 0.0
+    height, width = gray.shape
+    yy, xx = np.mgrid[:height, :width]
+    blob = np.exp(-((xx - width / 2) ** 2 + (yy - height / 2) ** 2) / (2 * (0.2 * width) ** 2))
+    glared = np.clip(gray + blob * 400, 0, 255).astype(np.uint8)
+    assert assess(glared).glare > 0.3
+
+def test_rejection_names_failed_checks():
+    gate = QualityGate(min_sharpness=10, min_contrast=10, min_resolution=200)
+    rejection = gate.check(np.full((75, 150), 255, np.uint8))
+    assert rejection["reason"] == "image_quality"
+    assert rejection["failed_checks"] == ["sharpness", "contrast", "resolution"]
+    assert rejection["thresholds"] == {"sharpness": 10, "contrast": 10, "resolution": 200}
+    assert rejection["scores"]["resolution"] == 150
+
+def test_gate_is_off_unless_enabled():
+    assert QualityGate.from_config({"min_sharpness": 10}) is None
+    gate = QualityGate.from_config({"enabled": True, "max_glare": 0.3})
+    assert gate.thresholds() == {"glare": 0.3}
+    assert gate.describe() == "glare=0.3"
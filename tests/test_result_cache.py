@@ -0,0 +1,51 @@
+import time
+from Module.extraction_result import ExtractionResult
+from Module.result_cache import ResultCache
+
+def make_result(name):
+    return ExtractionResult(
+        raw_text=f"Name: {name}",
+        fields={"name": {"text": name, "confidence": 0.95}},
+        overall_confidence=0.95
+    )
+
+def test_key_depends_on_settings():
+    key = ResultCache.make_key(b"image", "--psm 6", "1.0.0", 0.7)
+    assert key == ResultCache.make_key(b"image", "--psm 6", "1.0.0", 0.7)
+    assert key != ResultCache.make_key(b"image", "--psm 6", "1.0.1", 0.7)
+    assert key != ResultCache.make_key(b"image", "--psm 6", "1.0.0", 0.8)
+    assert key != ResultCache.make_key(b"other", "--psm 6", "1.0.0", 0.7)
+
+def test_lru_eviction_and_ttl():
+    cache = ResultCache(max_entries=2, ttl_seconds=0.2)
+    cache.put("a", make_result("Alice"))
+    cache.put("b", make_result("Bob"))
+    assert cache.get("a").fields["name"]["text"] == "Alice"
+    cache.put("c", make_result("Carol"))
+    assert cache.get("b") is None
+    time.sleep(0.25)
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_disk_tier_survives_restart(tmp_path):
+    disk_path = str(tmp_path / "results.sqlite")
+    ResultCache(disk_path=disk_path).put("a", make_result("Alice"))
+
+    cache = ResultCache(disk_path=disk_path)
+    result = cache.get("a")
+    assert result == make_result("Alice")
+    assert cache.stats()["disk_hits"] == 1
+
+def test_disk_tier_sweeps_expired_rows_occasionally(tmp_path, monkeypatch):
+    monkeypatch.setattr("Module.result_cache.SWEEP_EVERY", 3)
+    cache = ResultCache(ttl_seconds=0.1, disk_path=str(tmp_path / "results.sqlite"))
+    cache.put_many([("a", make_result("Alice")), ("b", make_result("Bob"))])
+    time.sleep(0.15)
+    rows = lambda: [key for (key,) in cache._db.execute("SELECT key FROM results ORDER BY key")]
+    assert rows() == ["a", "b"]
+    # The third write reaches the sweep interval and drops the expired rows
+    cache.put("c", make_result("Carol"))
+    assert rows() == ["c"]
+    plan = cache._db.execute("EXPLAIN QUERY PLAN DELETE FROM results WHERE expires_at <= 0").fetchall()
+    assert "results_expires_at" in str(plan)
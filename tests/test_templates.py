@@ -0,0 +1,109 @@
+import numpy as np
+from Module.id_card import IdCard
+from Module.ocr_backends import DATA_KEYS, OCRBackend
+from Module.preprocessing import to_grayscale
+from Module.templates import TemplateRegistry
+from api import tasks
+
+FONT = "resource/DejaVuSans.ttf"
+FIELDS = {
+    "name": "Nathan Henry",
+    "college": "JNTU Kakinada",
+    "roll_number": "22JNT5377",
+    "branch": "Computer Science",
+    "valid_upto": "2028"
+}
+
+class FieldBackend(OCRBackend):
+    """Answers each field crop with the value whose whitelist its config carries"""
+
+    def __init__(self, template):
+        self.values = {item.tesseract_config(): FIELDS[item.name] for item in template.fields}
+        self.configs = []
+
+    def image_to_data(self, image, config=""):
+        self.configs.append(config)
+        words = self.values[config].split()
+        rows = [(5, 1, 1, 1, 1, i + 1, 0, 0, 10, 10, 90.0, word) for i, word in enumerate(words)]
+        return {key: list(column) for key, column in zip(DATA_KEYS, zip(*rows))}
+
+def registry():
+    return TemplateRegistry.from_config({"enabled": True, "dir": "resource/templates"})
+
+def test_template_matches_only_its_layout():
+    card = to_grayscale(IdCard.render_card("stu_001", FIELDS, FONT))
+    assert registry().match(card)[0].name == "idcard"
+
+    # Same rows but a longer label, and a card with a field missing
+    university = {"name": "Nathan Henry", "university": "JNTU Kakinada", **{k: FIELDS[k] for k in ("roll_number", "branch", "valid_upto")}}
+    assert registry().match(to_grayscale(IdCard.render_card("stu_002", university, FONT))) is None
+    assert registry().match(to_grayscale(IdCard.render_card("stu_003", {k: FIELDS[k] for k in list(FIELDS)[1:]}, FONT))) is None
+    assert registry().match(np.full((300, 600), 255, np.uint8)) is None
+
+def test_matched_card_is_read_field_by_field(monkeypatch):
+    processor = tasks.get_processor()
+    templates = registry()
+    backend = FieldBackend(templates.templates[0])
+    monkeypatch.setattr(processor, "templates", templates)
+    monkeypatch.setattr(processor, "ocr_backend", backend)
+
+    result = processor.process_id_card(IdCard.render_card("stu_001", FIELDS, FONT))
+    assert {name: value["text"] for name, value in result.fields.items()} == FIELDS
+    # Values with the expected shape get the pattern bonus on top of tesseract's confidence
+    assert result.fields["branch"]["confidence"] == 1.0
+    assert result.fields["roll_number"]["confidence"] == 1.0
+    assert len(backend.configs) == len(FIELDS)
+    assert all("--psm 7" in config for config in backend.configs)
+
+def test_field_reads_are_cleaned_and_validated_like_free_text(monkeypatch):
+    processor = tasks.get_processor()
+    templates = registry()
+    backend = FieldBackend(templates.templates[0])
+    misread = {"name": "Nathan Henry |", "college": "J", "branch": "computer science"}
+    backend.values = {item.tesseract_config(): misread.get(item.name, FIELDS[item.name]) for item in templates.templates[0].fields}
+    monkeypatch.setattr(processor, "templates", templates)
+    monkeypatch.setattr(processor, "ocr_backend", backend)
+    monkeypatch.setattr(processor, "passes", processor.passes[:1])
+    monkeypatch.setattr(processor, "duplicates", None)
+
+    result = processor.process_id_card(IdCard.render_card("stu_001", FIELDS, FONT))
+    assert result.fields["name"]["text"] == "Nathan Henry"
+    # Shorter than the college's min_length in ner.fields
+    assert "college" not in result.fields
+    # Without its field's exact shape, a value keeps tesseract's confidence
+    assert result.fields["branch"]["confidence"] == 0.9
+
+def test_card_photo_is_matched_after_perspective_crop(monkeypatch):
+    import cv2
+
+    processor = tasks.get_processor()
+    templates = registry()
+    monkeypatch.setattr(processor, "templates", templates)
+    monkeypatch.setattr(processor, "ocr_backend", FieldBackend(templates.templates[0]))
+
+    card = to_grayscale(IdCard.render_card("stu_001", FIELDS, FONT))
+    # Upside down on a dark desk, seen at a slight angle
+    corners = np.float32([[1080, 760], [160, 700], [180, 250], [1100, 220]])
+    matrix = cv2.getPerspectiveTransform(np.float32([[0, 0], [600, 0], [600, 300], [0, 300]]), corners)
+    photo = cv2.warpPerspective(card, matrix, (1280, 960), borderValue=60)
+
+    assert templates.match(photo) is None
+    assert processor.match_template(photo)[0].name == "idcard"
+    result = processor.process_id_card(photo)
+    assert {name: value["text"] for name, value in result.fields.items()} == FIELDS
+
+def test_profile_includes_field_reads_on_pool_threads(monkeypatch, tmp_path):
+    import pstats
+    from Module.profiling import RequestProfiler
+
+    processor = tasks.get_processor()
+    templates = registry()
+    monkeypatch.setattr(processor, "templates", templates)
+    monkeypatch.setattr(processor, "ocr_backend", FieldBackend(templates.templates[0]))
+    monkeypatch.setattr(processor, "duplicates", None)
+
+    profiler = RequestProfiler()
+    profiler.run(processor.process_id_card, IdCard.render_card("stu_001", FIELDS, FONT), profiler)
+    stats = pstats.Stats(profiler.dump(str(tmp_path)))
+    reads = [calls for (_, _, function), (_, calls, *_) in stats.stats.items() if function == "image_to_data"]
+    assert reads == [len(FIELDS)]